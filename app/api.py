@@ -1,26 +1,126 @@
 from __future__ import annotations
 
+import asyncio
+import gc
+import io
+import json
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+import numpy as np
 import pandas as pd
 
+# Arrow IPC bodies for /score/batch (optional)
+try:
+    import pyarrow as pa  # type: ignore
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
 from .ingest import load_data
 from .categorize import Categorizer
-from .risk import train_scorecard
-from .experiment import simulate
-
-app = FastAPI(title="Finance Vibes API")
+from .risk import ModelRegistry
+from .experiment import SimulationContext, expand_grid, simulate, simulate_sweep
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+# Rules are tiny: build the categorizer at import so /categorize serves immediately
 categ = Categorizer(Path(__file__).resolve().parents[1] / "rules.yaml",
                     Path(__file__).resolve().parents[1] / "model.pkl")
-df_tx, df_cust = load_data(DATA_DIR)
+# Trained once the data is loaded; /score only does a lookup + predict_proba
+models = ModelRegistry()
+
+class DataState:
+    """Datasets and derived artifacts, loaded off the event loop."""
+    def __init__(self):
+        self.df_tx: pd.DataFrame | None = None
+        self.df_cust: pd.DataFrame | None = None
+        # Policy aggregates, computed once per data load
+        self.sim_ctx: SimulationContext | None = None
+        self.error: str | None = None
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        with self._lock:
+            if self.ready.is_set():
+                return
+            try:
+                df_tx, df_cust = load_data(DATA_DIR)
+                models.train(df_tx)
+                self.sim_ctx = SimulationContext.from_frames(df_tx, df_cust)
+                self.df_tx, self.df_cust = df_tx, df_cust
+                self.error = None
+                self.ready.set()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                logger.exception("Data load failed")
+
+state = DataState()
+
+def preload() -> None:
+    """Load everything synchronously, e.g. before forking workers.
+
+    With ``API_PRELOAD=1`` this runs at import, so a pre-forking server
+    (``gunicorn --preload -k uvicorn.workers.UvicornWorker app.api:app``)
+    loads once and workers share the read-only frames copy-on-write.
+    ``gc.freeze()`` keeps the collector from touching (and so copying)
+    those pages in the children.
+    """
+    state.load()
+    gc.freeze()
+
+if os.environ.get("API_PRELOAD") == "1":
+    preload()
+
+LOAD_RETRY_DELAY = 1.0
+LOAD_RETRY_MAX_DELAY = 60.0
+
+async def _load_with_retry() -> None:
+    """Load the data, retrying with exponential backoff (e.g. a transient disk/NFS error)."""
+    delay = LOAD_RETRY_DELAY
+    while True:
+        await asyncio.to_thread(state.load)
+        if state.ready.is_set():
+            return
+        logger.warning("Retrying data load in %.0fs", delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, LOAD_RETRY_MAX_DELAY)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    categ.start_watcher()
+    # Don't block startup on I/O: data-backed endpoints answer 503 until ready
+    loader = None if state.ready.is_set() else asyncio.create_task(_load_with_retry())
+    yield
+    categ.stop_watcher()
+    if loader is not None and not loader.done():
+        loader.cancel()
+
+app = FastAPI(title="Finance Vibes API", lifespan=lifespan)
+
+def _require_data() -> DataState:
+    if not state.ready.is_set():
+        detail = f"Data failed to load: {state.error}" if state.error else "Data is still loading"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+    return state
 
 class CatReq(BaseModel):
     merchant: str
     amount: float
 
+class CatBatchReq(BaseModel):
+    merchants: list[str]
+    amounts: list[float]
+
 class ScoreReq(BaseModel):
     # For demo, accept a single-row payload
     amount: float
@@ -38,17 +138,187 @@ class PolicyReq(BaseModel):
     new: float | None = None
     category: str | None = None
 
+MAX_SWEEP_POINTS = 10_000
+MAX_SWEEP_BOOT = 2_000
+
+class SweepReq(BaseModel):
+    policy: PolicyReq
+    grid: dict[str, list]
+    n_boot: int = Field(200, ge=1, le=MAX_SWEEP_BOOT)
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving (data may still be loading)."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: data loaded and the scorecard trained."""
+    if not state.ready.is_set():
+        status = "error" if state.error else "loading"
+        raise HTTPException(status_code=503, detail={"status": status, "error": state.error})
+    return {"status": "ready", "model_version": models.latest, "rules_version": categ.rules_version}
+
 @app.post("/categorize")
 def categorize(req: CatReq):
     return {"category": categ.predict(req.merchant, req.amount)}
 
+@app.get("/categorize/cache")
+def categorize_cache_stats():
+    return categ.cache.stats()
+
+@app.post("/admin/rules/reload")
+def reload_rules():
+    # Sync endpoint: compiles in the threadpool while other requests keep the old rules
+    try:
+        version = categ.reload()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not load rules: {e}")
+    return {"rules_version": version, "categories": len(categ.rules)}
+
+@app.post("/categorize/batch")
+def categorize_batch(req: CatBatchReq):
+    if len(req.merchants) != len(req.amounts):
+        raise HTTPException(status_code=422, detail="merchants and amounts must have the same length")
+    return {"categories": categ.predict_many(req.merchants, req.amounts).tolist()}
+
+def _get_model(version: int | None = None):
+    _require_data()
+    try:
+        return models.get(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+
 @app.post("/score")
-def score(req: ScoreReq):
-    model, report = train_scorecard(df_tx)
+def score(req: ScoreReq, version: int | None = None):
+    model, report = _get_model(version)
     proba = model.predict_proba(pd.DataFrame([req.dict()]))
-    return {"p_default": float(proba[0]), "report": report}
+    return {"p_default": float(proba[0]), "model_version": report["version"], "report": report}
+
+BATCH_CHUNK_ROWS = 10_000
+SCORE_DEFAULTS = {name: f.default for name, f in ScoreReq.model_fields.items() if not f.is_required()}
+SCORE_TYPES = {name: f.annotation for name, f in ScoreReq.model_fields.items()}
+
+def _read_batch(body: bytes, content_type: str) -> pd.DataFrame:
+    """Parse a /score/batch body into a frame.
+
+    Supported content types
+    -----------------------
+    - application/json: columnar ``{"amount": [...], "mcc": [...]}``
+    - application/x-ndjson: one ScoreReq-shaped object per line
+    - application/vnd.apache.arrow.stream / .file: Arrow IPC
+    """
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        if not body.strip():
+            return pd.DataFrame()
+        return pd.read_json(io.BytesIO(body), lines=True)
+    if content_type.startswith("application/vnd.apache.arrow"):
+        if not HAS_PYARROW:
+            raise HTTPException(status_code=415, detail="pyarrow is not installed; Arrow IPC bodies are unavailable")
+        reader = pa.ipc.open_file(body) if content_type.endswith(".file") else pa.ipc.open_stream(body)
+        return reader.read_all().to_pandas()
+    if content_type == "application/json":
+        cols = json.loads(body)
+        if not isinstance(cols, dict):
+            raise ValueError("columnar JSON must be an object of equal-length arrays")
+        return pd.DataFrame(cols)
+    raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+
+def _coerce_batch(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast each ScoreReq column to its declared type; 422 on bad or missing values."""
+    for col, typ in SCORE_TYPES.items():
+        if col not in df.columns:
+            continue
+        bad = df.index[df[col].isna()]
+        if len(bad):
+            raise HTTPException(status_code=422, detail=f"Column '{col}' has null values at rows {bad[:10].tolist()}")
+        if typ is str:
+            df[col] = df[col].astype(str)
+            continue
+        try:
+            values = pd.to_numeric(df[col], errors="raise").astype(float)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=422, detail=f"Column '{col}' must be {typ.__name__}: {e}")
+        bad = df.index[~np.isfinite(values)] if typ is float else df.index[values % 1 != 0]
+        if len(bad):
+            raise HTTPException(status_code=422, detail=f"Column '{col}' has invalid {typ.__name__} values at rows {bad[:10].tolist()}")
+        df[col] = values.astype(typ)
+    return df
+
+def _score_body(model, body: bytes, content_type: str) -> np.ndarray:
+    """Parse, validate and score a batch body (CPU-bound; runs in the threadpool)."""
+    try:
+        df = _read_batch(body, content_type)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse batch body: {e}")
+    if not len(df):
+        return np.empty(0)
+    if "amount" not in df.columns:
+        raise HTTPException(status_code=422, detail="Column 'amount' is required")
+    df = _coerce_batch(df)
+    for col, default in SCORE_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+    return model.predict_proba(df)
+
+def _iter_scores(proba: np.ndarray):
+    for start in range(0, len(proba), BATCH_CHUNK_ROWS):
+        chunk = proba[start:start + BATCH_CHUNK_ROWS]
+        yield "".join('{"p_default":%r}\n' % float(p) for p in chunk)
+
+@app.post("/score/batch")
+async def score_batch(request: Request, version: int | None = None):
+    """Score many rows in one vectorized pass; streams NDJSON ``{"p_default": ...}`` lines in input order."""
+    model, report = _get_model(version)
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    body = await request.body()
+    # parsing and scoring large bodies must not block the event loop
+    proba = await run_in_threadpool(_score_body, model, body, content_type)
+    return StreamingResponse(_iter_scores(proba), media_type="application/x-ndjson",
+                             headers={"X-Model-Version": str(report["version"]), "X-Row-Count": str(len(proba))})
+
+@app.get("/models")
+def list_models():
+    return {"versions": models.versions(), "latest": models.latest}
+
+@app.post("/models/retrain")
+def retrain_model():
+    version = models.train(_require_data().df_tx)
+    _, report = models.get(version)
+    return {"version": version, "report": report}
+
+@app.get("/models/{version}/report")
+def model_report(version: int):
+    _, report = _get_model(version)
+    return report
 
 @app.post("/simulate")
 def simulate_policy(req: PolicyReq):
-    out = simulate(req.dict(), df_tx, df_cust)
+    data = _require_data()
+    out = simulate(req.dict(), data.df_tx, data.df_cust, ctx=data.sim_ctx)
     return out
+
+@app.post("/simulate/sweep")
+def simulate_policy_sweep(req: SweepReq):
+    """Evaluate a policy parameter grid; streams one NDJSON result per grid point."""
+    unknown = set(req.grid) - set(PolicyReq.model_fields)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown policy fields in grid: {sorted(unknown)}")
+    # exact Python-int product, rejected as soon as it passes the cap (np.prod wraps around in int64)
+    n_points = 1
+    for values in req.grid.values():
+        n_points *= len(values)
+        if n_points > MAX_SWEEP_POINTS:
+            raise HTTPException(status_code=422, detail=f"Grid has more than {MAX_SWEEP_POINTS} points")
+    # validate every grid point up front: errors inside the stream would truncate it after the 200
+    try:
+        policies = [PolicyReq(**p).dict(exclude_none=True)
+                    for p in expand_grid(req.policy.dict(exclude_none=True), req.grid)]
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid grid values: {e.errors(include_url=False)}")
+    data = _require_data()
+    results = simulate_sweep(policies, data.df_tx, data.df_cust, n_boot=req.n_boot, ctx=data.sim_ctx)
+    return StreamingResponse((json.dumps(r) + "\n" for r in results), media_type="application/x-ndjson")
+
@@ -1,68 +1,83 @@
+# --- make package imports work no matter where you run from ---
+from pathlib import Path
+import sys
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+# -------------------------------------------------------------
+
 import streamlit as st
 import json
 import pandas as pd
 from datetime import datetime
-import os
-from pathlib import Path
+
+from app.sync_store import get_store
 
 # Configuração da API
 API_VERSION = "1.0"
 SYNC_DATA_FILE = "sync_data.json"
 
+def default_sync_data():
+    return {
+        "version": API_VERSION,
+        "last_sync": None,
+        "local_dashboards": {},
+        "ping_results": {},
+        "printer_details": {},
+        "sync_status": "waiting"
+    }
+
+def sync_store():
+    """Store em memória do processo; o arquivo é gravado em segundo plano"""
+    return get_store(SYNC_DATA_FILE, default_sync_data)
+
 def init_sync_data():
-    """Inicializa dados de sincronização"""
-    if not os.path.exists(SYNC_DATA_FILE):
-        default_data = {
-            "version": API_VERSION,
-            "last_sync": None,
-            "local_dashboards": {},
-            "ping_results": {},
-            "printer_details": {},
-            "sync_status": "waiting"
-        }
-        
-        with open(SYNC_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(default_data, f, indent=2, ensure_ascii=False)
-        
-        return default_data
-    
-    with open(SYNC_DATA_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Inicializa dados de sincronização (cópia dos dados em memória)"""
+    return sync_store().snapshot()
 
 def save_sync_data(data):
     """Salva dados de sincronização"""
-    with open(SYNC_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    sync_store().replace(data)
 
 def update_sync_status(status):
     """Atualiza status de sincronização"""
-    data = init_sync_data()
-    data["sync_status"] = status
-    data["last_sync"] = datetime.now().isoformat()
-    save_sync_data(data)
+    def mutate(data):
+        data["sync_status"] = status
+        data["last_sync"] = datetime.now().isoformat()
+    sync_store().update(mutate)
 
 def receive_ping_results(results_data):
-    """Recebe resultados de ping do dashboard local"""
+    """Recebe resultados de ping do dashboard local
+    
+    Com ``"mode": "delta"`` só os IPs enviados são atualizados e os listados
+    em ``"removed"`` são apagados; sem isso o payload substitui tudo.
+    """
     try:
-        data = init_sync_data()
-        
-        # Atualizar dados
-        data["ping_results"] = results_data.get("results", {})
-        data["printer_details"] = results_data.get("printer_details", {})
-        data["last_sync"] = datetime.now().isoformat()
-        data["sync_status"] = "synced"
-        
-        # Adicionar informações do dashboard local
-        local_dashboard_info = {
-            "timestamp": results_data.get("timestamp"),
-            "source": results_data.get("source"),
-            "version": results_data.get("version")
-        }
-        
-        data["local_dashboards"][datetime.now().isoformat()] = local_dashboard_info
+        def mutate(data):
+            # Atualizar dados
+            if results_data.get("mode") == "delta":
+                data["ping_results"].update(results_data.get("results", {}))
+                data["printer_details"].update(results_data.get("printer_details", {}))
+                for ip in results_data.get("removed", []):
+                    data["ping_results"].pop(ip, None)
+                    data["printer_details"].pop(ip, None)
+            else:
+                data["ping_results"] = results_data.get("results", {})
+                data["printer_details"] = results_data.get("printer_details", {})
+            data["last_sync"] = datetime.now().isoformat()
+            data["sync_status"] = "synced"
+            
+            # Adicionar informações do dashboard local
+            local_dashboard_info = {
+                "timestamp": results_data.get("timestamp"),
+                "source": results_data.get("source"),
+                "version": results_data.get("version")
+            }
+            
+            data["local_dashboards"][datetime.now().isoformat()] = local_dashboard_info
         
-        # Salvar dados
-        save_sync_data(data)
+        # Atualiza em memória; a gravação em disco é agrupada em segundo plano
+        sync_store().update(mutate)
         
         return True, "✅ Dados sincronizados com sucesso!"
         
@@ -80,24 +95,21 @@ def get_sync_status():
 def get_ping_results():
     """Retorna resultados de ping sincronizados"""
     try:
-        data = init_sync_data()
-        return data.get("ping_results", {})
+        return sync_store().get("ping_results", {})
     except Exception as e:
         return {}
 
 def get_printer_details():
     """Retorna detalhes das impressoras sincronizados"""
     try:
-        data = init_sync_data()
-        return data.get("printer_details", {})
+        return sync_store().get("printer_details", {})
     except Exception as e:
         return {}
 
 def clear_sync_data():
     """Limpa dados de sincronização"""
     try:
-        if os.path.exists(SYNC_DATA_FILE):
-            os.remove(SYNC_DATA_FILE)
+        sync_store().reset()
         return True, "✅ Dados de sincronização limpos!"
     except Exception as e:
         return False, f"❌ Erro ao limpar dados: {str(e)}"
@@ -1,10 +1,150 @@
 from __future__ import annotations
 
+import logging
 import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
 import yaml
 
+class RuleMatcher:
+    """Aho-Corasick automaton over all rule substrings.
+
+    Each pattern carries the priority of its category (YAML order). ``match``
+    scans the text once and returns the highest-priority category with any
+    matching substring, i.e. the same answer as the nested
+    ``for cat ...: for s ...: if s in text`` loop, in O(len(text) + matches).
+
+    Examples
+    --------
+    >>> m = RuleMatcher({'transport': ['UBER'], 'misc': ['SHOP', 'UB']})
+    >>> m.match('UBER SHOP')
+    'transport'
+    """
+    def __init__(self, rules: Dict[str, List[str]]):
+        self.categories = list(rules)
+        goto: List[Dict[str, int]] = [{}]
+        prio: List[float] = [float("inf")]
+        for p, subs in enumerate(rules.values()):
+            for s in subs:
+                node = 0
+                for ch in s:
+                    nxt = goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[node][ch] = nxt
+                        goto.append({})
+                        prio.append(float("inf"))
+                    node = nxt
+                prio[node] = min(prio[node], p)
+        # BFS for failure links; fold each node's suffix outputs into its priority
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                prio[nxt] = min(prio[nxt], prio[fail[nxt]])
+                queue.append(nxt)
+        self._goto = goto
+        self._fail = fail
+        self._prio = prio
+
+    def match(self, text: str) -> Optional[str]:
+        goto, fail, prio = self._goto, self._fail, self._prio
+        best = prio[0]
+        node = 0
+        for ch in text:
+            if best == 0:
+                break
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if prio[node] < best:
+                best = prio[node]
+        return None if best == float("inf") else self.categories[int(best)]
+
+logger = logging.getLogger(__name__)
+
+# Fallback heuristic threshold; also the only amount split the cache key needs
+ELECTRONICS_MIN_AMOUNT = 400
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with optional TTL and hit/miss counters.
+
+    Examples
+    --------
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache.put('a', 1)
+    >>> cache.get('a')
+    (True, 1)
+    >>> cache.get('b')
+    (False, None)
+    """
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, stamp = item
+                if self.ttl is None or time.monotonic() - stamp < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """One immutable rule-set generation; swapped as a single reference."""
+    rules: Dict[str, List[str]]
+    matcher: RuleMatcher
+    version: int
+    mtime: float
+
 class Categorizer:
     """Hybrid rules + (optional) ML fallback categorizer.
 
@@ -14,6 +154,10 @@ class Categorizer:
         YAML with {category: [substr, ...]}
     model_path : Optional[str | Path]
         If provided, used as fallback (not required).
+    cache_size : int
+        Max memoized (merchant, amount bucket) results; 0 disables the cache.
+    cache_ttl : Optional[float]
+        Seconds before a memoized result expires (None = no expiry).
 
     Examples
     --------
@@ -21,10 +165,15 @@ class Categorizer:
     >>> c.predict('UBER *TRIP', 42.0)
     'transport'
     """
-    def __init__(self, rules_path: str | Path, model_path: Optional[str | Path] = None):
+    def __init__(self, rules_path: str | Path, model_path: Optional[str | Path] = None,
+                 cache_size: int = 4096, cache_ttl: Optional[float] = None):
         self.rules_path = Path(rules_path)
         self.model_path = Path(model_path) if model_path else None
-        self.rules = self._load_rules(self.rules_path)
+        self._compiled = self._compile(version=1)
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watch = threading.Event()
+        self.cache = LRUCache(cache_size, cache_ttl)
         self.model = None
         if self.model_path and self.model_path.exists():
             try:
@@ -41,16 +190,92 @@ class Categorizer:
         rules = {cat: [s.upper() for s in subs] for cat, subs in raw.items()}
         return rules
 
+    def _compile(self, version: int) -> CompiledRules:
+        mtime = self.rules_path.stat().st_mtime
+        rules = self._load_rules(self.rules_path)
+        return CompiledRules(rules, RuleMatcher(rules), version, mtime)
+
+    @property
+    def rules(self) -> Dict[str, List[str]]:
+        return self._compiled.rules
+
+    @property
+    def matcher(self) -> RuleMatcher:
+        return self._compiled.matcher
+
+    @property
+    def rules_version(self) -> int:
+        return self._compiled.version
+
+    def reload(self) -> int:
+        """Re-read and compile ``rules_path``, then swap it in atomically.
+
+        Requests keep using the previous rule set until the swap; a YAML
+        error raises and leaves the current rules in place. Returns the new
+        rules version.
+        """
+        with self._reload_lock:
+            compiled = self._compile(self._compiled.version + 1)
+            self._compiled = compiled
+        # Keys carry the rules version, so late writes from old-rules requests never hit
+        self.cache.clear()
+        logger.info("Loaded %s (version %d, %d categories)", self.rules_path, compiled.version, len(compiled.rules))
+        return compiled.version
+
+    def reload_if_changed(self) -> bool:
+        """Reload when ``rules_path``'s mtime differs from the loaded one."""
+        if self.rules_path.stat().st_mtime == self._compiled.mtime:
+            return False
+        self.reload()
+        return True
+
+    def start_watcher(self, interval: float = 2.0) -> None:
+        """Poll ``rules_path`` every ``interval`` seconds in a daemon thread."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watch.clear()
+
+        def _watch():
+            bad_mtime = None
+            while not self._stop_watch.wait(interval):
+                mtime = None
+                try:
+                    mtime = self.rules_path.stat().st_mtime
+                    if mtime not in (self._compiled.mtime, bad_mtime):
+                        self.reload()
+                except Exception:
+                    # don't retry (and re-log) the same broken file every tick
+                    bad_mtime = mtime
+                    logger.exception("Could not reload %s; keeping version %d", self.rules_path, self.rules_version)
+
+        self._watcher = threading.Thread(target=_watch, name="rules-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop_watch.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
     def predict(self, merchant: str, amount: float) -> str:
+        compiled = self._compiled
         text = (merchant or "").upper()
-        # 1) Rules first
-        for cat, subs in self.rules.items():
-            for s in subs:
-                if s in text:
-                    return cat
+        key = (compiled.version, text, bool(amount >= ELECTRONICS_MIN_AMOUNT))
+        hit, cat = self.cache.get(key)
+        if hit:
+            return cat
+        cat = self._predict_text(compiled.matcher, text, amount)
+        self.cache.put(key, cat)
+        return cat
+
+    def _predict_text(self, matcher: RuleMatcher, text: str, amount: float) -> str:
+        # 1) Rules first (single pass over all patterns, first category wins)
+        cat = matcher.match(text)
+        if cat is not None:
+            return cat
         # 2) Fallback: tiny heuristic if no model
         if self.model is None:
-            if amount >= 400:
+            if amount >= ELECTRONICS_MIN_AMOUNT:
                 return "electronics"
             return "misc"
         # 3) If a model exists, we can try to use it gracefully
@@ -59,3 +284,30 @@ class Categorizer:
             return "misc"
         except Exception:
             return "misc"
+
+    def predict_many(self, merchants: Sequence[str], amounts: Sequence[float]) -> np.ndarray:
+        """Categorize many transactions at once.
+
+        Rules are evaluated once per *unique* upper-cased merchant and the
+        results are broadcast back, so repeated merchants cost a lookup.
+        Gives the same answer as ``predict`` row by row.
+
+        Examples
+        --------
+        >>> c = Categorizer('rules.yaml', None)
+        >>> c.predict_many(['UBER *TRIP', 'uber *trip', 'TV STORE'], [42.0, 10.0, 900.0]).tolist()
+        ['transport', 'transport', 'electronics']
+        """
+        texts = pd.Series(merchants, dtype=object).fillna("").astype(str).str.upper()
+        amounts = np.asarray(amounts, dtype=float)
+        if len(amounts) != len(texts):
+            raise ValueError("merchants and amounts must have the same length")
+        codes, uniques = pd.factorize(texts)
+        matcher = self.matcher
+        matched = np.array([matcher.match(t) for t in uniques], dtype=object)[codes]
+        if self.model is None:
+            fallback = np.where(amounts >= ELECTRONICS_MIN_AMOUNT, "electronics", "misc").astype(object)
+        else:
+            fallback = np.full(len(texts), "misc", dtype=object)
+        return np.where(pd.isna(matched), fallback, matched)
+
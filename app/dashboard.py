@@ -4793,61 +4793,21 @@ def check_printer_web(ip_address, timeout=1):
         except:
             return False
 
-def get_ink_levels(ip_address):
+def get_ink_levels(ip_address, modelo=None):
     """Busca níveis de tinta da impressora Epson via HTTP"""
+    from app.printer_ink import get_ink_fetcher
     try:
-        # Tentar diferentes URLs comuns para Epson WF-C5790
-        urls_to_try = [
-            f"http://{ip_address}/PRESENTATION/HTML/TOP/PRTINFO.HTML",
-            f"http://{ip_address}/PRESENTATION/HTML/TOP/TOP.HTML", 
-            f"http://{ip_address}/cgi-bin/inkjetStatus",
-            f"http://{ip_address}/status",
-            f"http://{ip_address}/ink_level"
-        ]
-        
-        for url in urls_to_try:
-            try:
-                response = requests.get(url, timeout=2)
-                if response.status_code == 200:
-                    content = response.text.lower()
-                    
-                    # Buscar informações de tinta no HTML
-                    ink_info = {"black": "N/A", "cyan": "N/A", "magenta": "N/A", "yellow": "N/A"}
-                    
-                    # Padrões comuns para níveis de tinta Epson
-                    if "ink" in content or "tinta" in content:
-                        import re
-                        
-                        # Buscar porcentagens ou níveis
-                        patterns = [
-                            r'black.*?(\d+)%',
-                            r'cyan.*?(\d+)%', 
-                            r'magenta.*?(\d+)%',
-                            r'yellow.*?(\d+)%',
-                            r'preto.*?(\d+)%',
-                            r'azul.*?(\d+)%'
-                        ]
-                        
-                        colors = ["black", "cyan", "magenta", "yellow", "black", "cyan"]
-                        
-                        for i, pattern in enumerate(patterns):
-                            matches = re.findall(pattern, content, re.IGNORECASE)
-                            if matches and i < 4:  # Apenas as 4 primeiras cores
-                                ink_info[colors[i]] = f"{matches[0]}%"
-                    
-                    return ink_info
-            except:
-                continue
-                
-        return {"status": "Sem acesso web"}
-    except:
+        # Sessão keep-alive por host; a URL que funcionou fica memorizada por modelo
+        return get_ink_fetcher().fetch(ip_address, modelo)
+    except Exception:
         return {"status": "Erro na consulta"}
 
 def get_printer_status_fast(ip_address):
     """Obtém status completo da impressora - versão super otimizada"""
+    from app.printer_scan import scan_printer
     
-    # Verificação rápida de ping
-    ping_ok = ping_ip_simple(ip_address)
+    # Verificação rápida por sonda TCP (porta 9100/80), sem ping bloqueante
+    ping_ok = scan_printer(ip_address)["online"]
     
     if not ping_ok:
         return {"status": "● Offline", "ink_levels": {"status": "Offline"}}
@@ -4865,9 +4825,13 @@ def get_printer_status_fast(ip_address):
         return {"status": "● Offline", "ink_levels": {"status": "Offline"}}
 
 def ping_all_printers_simple(printers_df):
-    """Faz ping simples em todas as impressoras - direto ao ponto"""
+    """Verifica todas as impressoras de uma vez - scan concorrente"""
+    from app.printer_scan import scan_printers
     results = {}
     
+    ips = printers_df['ip_rede'].tolist() if 'ip_rede' in printers_df.columns else []
+    scan = scan_printers(ips)
+    
     for idx, row in printers_df.iterrows():
         ip = row['ip_rede'] if 'ip_rede' in row else 'N/A'
         
@@ -4877,8 +4841,7 @@ def ping_all_printers_simple(printers_df):
                 "url": ""
             }
         else:
-            # Fazer ping direto
-            ping_ok = ping_ip_simple(ip)
+            ping_ok = scan.get(ip, {}).get("online", False)
             
             if ping_ok:
                 results[idx] = {
@@ -4893,6 +4856,25 @@ def ping_all_printers_simple(printers_df):
     
     return results
 
+def get_printer_poller():
+    """Poller de impressoras do processo - uma thread de scan para todas as sessões
+    
+    Com ``PING_AGENT_URL`` definido o status chega por push do agente local
+    (``get_status_receiver``) e este processo não faz scans próprios; o poller
+    só amostra o status para o histórico e busca os níveis de tinta.
+    """
+    from app.printer_poller import get_poller
+    return get_poller("template_impressoras_exemplo.csv", fetch_ink=True, history_path="printer_history.sqlite",
+                      scan=not os.environ.get("PING_AGENT_URL"))
+
+def get_status_receiver(poller, ips):
+    """Assinatura SSE do agente local (ping_service.py /events), se configurado em PING_AGENT_URL"""
+    agent_url = os.environ.get("PING_AGENT_URL")
+    if not agent_url:
+        return None
+    from app.status_stream import get_receiver
+    return get_receiver(agent_url, poller.store, ips)
+
 
 # ========== INTEGRAÇÃO PAPERCUT ==========
 
@@ -4976,8 +4958,8 @@ class PaperCutConnector:
             st.warning(f"⚠️ Erro no login PaperCut: {str(e)}")
             return True  # Continuar mesmo sem login
     
-    def get_printers_data(self):
-        """Busca dados das impressoras no PaperCut - versão robusta"""
+    def get_printers_data(self, refresh=False):
+        """Busca dados das impressoras no PaperCut - versão robusta (refresh=True testa todas as URLs)"""
         try:
             if not self.authenticate():
                 st.warning("⚠️ Não foi possível autenticar no PaperCut, tentando acesso direto...")
@@ -5011,40 +4993,23 @@ class PaperCutConnector:
                 f"{self.base_url.replace('Home', 'Printers')}",
             ]
             
-            successful_urls = []
+            # Páginas baixadas em paralelo; URLs que já trouxeram dados e registros
+            # já extraídos ficam em cache no processo (ETag/TTL)
+            from app.papercut import fetch_printer_pages, get_page_cache
+            printers_data, report = fetch_printer_pages(
+                self.session, printer_urls, self._parse_printer_data_advanced,
+                get_page_cache(), base_url_clean, refresh=refresh)
             
-            for url in printer_urls:
-                try:
-                    st.write(f"◯ Tentando: `{url.split('?')[1] if '?' in url else url}`")
-                    response = self.session.get(url, verify=False, timeout=20)
-                    
-                    if response.status_code == 200 and len(response.text) > 500:
-                        # Verificar se contém dados de impressoras
-                        content_lower = response.text.lower()
-                        printer_indicators = [
-                            '172.', 'printer', 'epson', 'hp', 'canon', 'pages', 'páginas',
-                            'toner', 'ink', 'status', 'online', 'offline', 'device'
-                        ]
-                        
-                        found_indicators = sum(1 for indicator in printer_indicators if indicator in content_lower)
-                        
-                        if found_indicators >= 3:  # Se encontrou pelo menos 3 indicadores
-                            st.success(f"● Dados encontrados em: {url.split('?')[1] if '?' in url else 'URL base'}")
-                            successful_urls.append(url)
-                            
-                            # Extrair dados desta página
-                            extracted_data = self._parse_printer_data_advanced(response.text, url)
-                            if extracted_data:
-                                printers_data.update(extracted_data)
-                                st.write(f"▬ Extraídos {len(extracted_data)} registros")
-                        else:
-                            st.write(f"◯ Poucos indicadores encontrados ({found_indicators}/10)")
-                    else:
-                        st.write(f"× Status {response.status_code} ou conteúdo insuficiente")
-                        
-                except Exception as e:
-                    st.write(f"⚠️ Erro: {str(e)[:50]}...")
-                    continue
+            successful_urls = []
+            for url, outcome, n_records, detail in report:
+                label = url.split('?')[1] if '?' in url else url
+                if outcome in ("nova", "inalterada", "cache") and n_records:
+                    successful_urls.append(url)
+                    st.write(f"● `{label}`: {n_records} registros ({outcome})")
+                elif outcome == "erro":
+                    st.write(f"⚠️ `{label}`: Erro: {detail}...")
+                else:
+                    st.write(f"× `{label}`: {detail or 'sem impressoras'}")
             
             # Resumo final
             if printers_data:
@@ -5235,8 +5200,16 @@ class PaperCutConnector:
         return self._parse_printer_data_advanced(html_content, "legacy")
 
 
-def sync_with_papercut():
-    """Sincroniza dados das impressoras com o PaperCut - versão detalhada"""
+# Campos do PaperCut aplicados na tabela de impressoras no sync incremental
+PAPERCUT_TABLE_FIELDS = {"status": "papercut_status", "contador": "contador_paginas", "toner_levels": "toner_levels"}
+
+def sync_with_papercut(incremental=True):
+    """Sincroniza dados das impressoras com o PaperCut - versão detalhada
+    
+    Com ``incremental`` o resultado é comparado com o último snapshot: só os
+    campos alterados vão para a tabela de impressoras e só o delta é enviado
+    para a API de sincronização.
+    """
     papercut_url = "https://10.101.17.12:9192/app;jsessionid=node01hyygt0yrvxrc471ubq3emjvt228.node0?service=page/Home"
     papercut_password = "4sE5gZzuqxKZe"
     
@@ -5277,7 +5250,7 @@ def sync_with_papercut():
             connector = PaperCutConnector(papercut_url, papercut_password)
             
             st.write("▬ **Etapa 3:** Buscando dados das impressoras...")
-            st.write("*(Este processo pode demorar 1-2 minutos, pois testa múltiplas URLs)*")
+            st.write("*(As URLs são testadas em paralelo; syncs seguintes consultam só as que já trouxeram dados)*")
             
             # Expandir seção para mostrar progresso detalhado
             with st.expander("▬ **Ver progresso detalhado**", expanded=True):
@@ -5298,6 +5271,24 @@ def sync_with_papercut():
                         with col3:
                             st.write(f"▬ Status: {printer_info.get('status', 'N/A')}")
                 
+                if incremental:
+                    from app.papercut import apply_to_rows, get_papercut_sync
+                    papercut_sync = get_papercut_sync()
+                    change = papercut_sync.apply(papercut_data)
+                    counts = change["counts"]
+                    st.write(f"▬ **Mudanças desde o último sync:** {counts['added']} novas, "
+                             f"{counts['changed']} alteradas, {counts['removed']} removidas")
+                    
+                    if any(counts.values()):
+                        impressoras_data = st.session_state.get('impressoras_data')
+                        if isinstance(impressoras_data, dict):
+                            rows = [p for local_data in impressoras_data.values() for p in local_data["impressoras"]]
+                            apply_to_rows(rows, change, PAPERCUT_TABLE_FIELDS)
+                        
+                        from app.api_sync import receive_ping_results
+                        ok, message = receive_ping_results(papercut_sync.delta_payload(change))
+                        st.write(message)
+                
                 return papercut_data
             else:
                 st.warning("⚠️ **Nenhuma impressora encontrada no PaperCut.**")
@@ -5413,9 +5404,13 @@ def render_impressoras():
     # Usar dados do session_state  
     impressoras_data = st.session_state.impressoras_data
     
-    # Cache de status das impressoras
-    if 'printer_status_cache' not in st.session_state:
-        st.session_state.printer_status_cache = {}
+    # Status vem do poller em segundo plano, compartilhado por todas as sessões:
+    # abrir a página só lê o store, sem nenhum ping
+    poller = get_printer_poller()
+    printer_ips = [printer["ip"] for local_data in impressoras_data.values() for printer in local_data["impressoras"]]
+    poller.watch(printer_ips)
+    # Agente local configurado: mudanças de status chegam por push, sem polling
+    agent = get_status_receiver(poller, printer_ips)
     
     # Auto-scan das impressoras quando acessar a aba
     if 'auto_scan_executed' not in st.session_state:
@@ -5423,26 +5418,11 @@ def render_impressoras():
     
     impressoras_data = st.session_state.impressoras_data
     
-    # Executar scan automaticamente na primeira vez que acessa a aba
+    # Na primeira visita, esperar o primeiro scan do poller (se ainda não terminou)
     if not st.session_state.auto_scan_executed:
         with st.spinner("⟳ **Scan Automático:** Verificando conectividade de todas as impressoras..."):
-            st.session_state.printer_status_cache = {}
-            for local_name, local_data in impressoras_data.items():
-                for printer in local_data["impressoras"]:
-                    import subprocess
-                    import platform
-                    
-                    try:
-                        param = "-n" if platform.system().lower() == "windows" else "-c"
-                        result = subprocess.run(
-                            ["ping", param, "1", printer["ip"]],
-                            capture_output=True,
-                            text=True,
-                            timeout=3
-                        )
-                        st.session_state.printer_status_cache[printer["ip"]] = result.returncode == 0
-                    except:
-                        st.session_state.printer_status_cache[printer["ip"]] = False
+            poller.wait_for_scan(timeout=10)
+            st.session_state.printer_status_cache = poller.store.online_map()
             
             # Contar resultados
             online_count = sum(1 for status in st.session_state.printer_status_cache.values() if status)
@@ -5468,23 +5448,11 @@ def render_impressoras():
     with col_ping:
         if st.button('⟳ ATUALIZAR STATUS MANUALMENTE', use_container_width=True, type="secondary", help="Forçar nova verificação de conectividade"):
             with st.spinner("⟳ Testando conectividade de todas as impressoras..."):
-                st.session_state.printer_status_cache = {}
-                for local_name, local_data in impressoras_data.items():
-                   for printer in local_data["impressoras"]:
-                        import subprocess
-                        import platform
-                        
-                        try:
-                            param = "-n" if platform.system().lower() == "windows" else "-c"
-                            result = subprocess.run(
-                                ["ping", param, "1", printer["ip"]],
-                                capture_output=True,
-                                text=True,
-                                timeout=3
-                            )
-                            st.session_state.printer_status_cache[printer["ip"]] = result.returncode == 0
-                        except:
-                            st.session_state.printer_status_cache[printer["ip"]] = False
+                if agent is not None:
+                    agent.refresh(timeout=10)
+                else:
+                    poller.poll_now(timeout=10)
+                st.session_state.printer_status_cache = poller.store.online_map()
                 
                 # Contar resultados
                 online_count = sum(1 for status in st.session_state.printer_status_cache.values() if status)
@@ -5539,30 +5507,11 @@ def render_impressoras():
         refresh_interval = st.selectbox("⏱️ Intervalo", [30, 60, 120, 300], index=0, format_func=lambda x: f"{x}s")
     
     if auto_refresh:
-        st.info(f"◯ **Auto refresh ativo:** Próxima verificação em {refresh_interval} segundos")
-        placeholder = st.empty()
-        time.sleep(refresh_interval)
-        placeholder.success("◯ **Fazendo ping automático...**")
-        
-        # Fazer ping automaticamente em todas as impressoras
-        for local_name, local_data in impressoras_data.items():
-            for printer in local_data["impressoras"]:
-                import subprocess
-                import platform
-                
-                try:
-                    param = "-n" if platform.system().lower() == "windows" else "-c"
-                    result = subprocess.run(
-                        ["ping", param, "1", printer["ip"]],
-                        capture_output=True,
-                        text=True,
-                        timeout=3
-                    )
-                    st.session_state.printer_status_cache[printer["ip"]] = result.returncode == 0
-                except:
-                    st.session_state.printer_status_cache[printer["ip"]] = False
-        
-        st.rerun()
+        st.info(f"◯ **Auto refresh ativo:** os cards atualizam assim que o status mudar (no máximo a cada {refresh_interval} segundos)")
+    
+    # número da atualização exibida, para o auto refresh esperar pela próxima
+    rendered_scans = poller.store.scans
+    st.session_state.printer_status_cache = poller.store.online_map()
     
     st.divider()
     
@@ -5673,25 +5622,32 @@ def render_impressoras():
     
     st.divider()
     
+    # Histórico das impressoras (lido do disco, sem novo scan): uptime 24h e previsão de tinta
+    uptime_24h, ink_alerts = {}, {}
+    if poller.history is not None:
+        uptime_24h = poller.history.uptime(time.time() - 86400)
+    # previsão calculada pela thread do poller; a página só lê o resultado
+    if poller.forecast is not None:
+        forecast = poller.forecast[poller.forecast["days_left"] != float("inf")]
+        for row in forecast.sort_values("days_left").drop_duplicates("ip").itertuples():
+            ink_alerts[row.ip] = f"{row.color} {row.level:.0f}% (~{row.days_left:.0f} dias)"
+    
     # Exibir por abas (HQ1, HQ2, SPARK)
     tab_hq1, tab_hq2, tab_spark = st.tabs(["▬ HQ1", "▬ HQ2", "◆ SPARK"])
 
-    import subprocess
-    import platform
+    from app.printer_scan import scan_printer
     
     def ping_ip(ip):
-        """Testa conectividade com o IP"""
-        try:
-            param = "-n" if platform.system().lower() == "windows" else "-c"
-            result = subprocess.run(
-            ["ping", param, "1", ip],
-                capture_output=True,
-                text=True,
-                timeout=3
-                )
-            return result.returncode == 0
-        except:
-            return False
+        """Testa conectividade com o IP e publica o resultado no store compartilhado"""
+        if agent is not None:
+            # status vem do agente local: testar por ele e não sobrescrever o push com um scan daqui
+            result = agent.ping(ip)
+            if result is None:
+                return (poller.store.get(ip) or {}).get("online", False)
+            return result["online"]
+        result = scan_printer(ip)
+        poller.store.update({ip: result})
+        return result["online"]
 
     for tab, (local_name, local_data) in zip([tab_hq1, tab_hq2, tab_spark], impressoras_data.items()):
         with tab:
@@ -5755,6 +5711,8 @@ def render_impressoras():
                 status_icon = "●" if is_online else "●"
                 status_text = "ONLINE" if is_online else "OFFLINE"
                 papercut_icon = "●" if printer["papercut"] else "×"
+                uptime_text = f'{uptime_24h[printer["ip"]]:.1f}%' if printer["ip"] in uptime_24h else "N/A"
+                ink_text = ink_alerts.get(printer["ip"], "N/A")
 
                 # Card da impressora
                 st.markdown(f"""
@@ -5764,6 +5722,7 @@ def render_impressoras():
                         <h4 style='margin: 0; color: #333;'>{status_icon} {printer["local"]}</h4>
                             <p style='margin: 5px 0; color: #666;'><strong>IP:</strong> {printer["ip"]} | <strong>Serial:</strong> {printer["serial"]} | <strong>Modelo:</strong> {printer.get("modelo", "N/A")}</p>
                             <p style='margin: 0; color: #666;'><strong>Status:</strong> {status_text} | <strong>Papercut:</strong> {papercut_icon} | <strong>Status Manual:</strong> {printer.get("status_manual", "N/A")}</p>
+                            <p style='margin: 5px 0 0 0; color: #666;'><strong>Uptime 24h:</strong> {uptime_text} | <strong>Tinta acabando:</strong> {ink_text}</p>
                             </div>
                         <div style='text-align: right;'>
                         <div class='status-badge {"status-online" if is_online else "status-offline"}'>
@@ -5815,6 +5774,11 @@ def render_impressoras():
                         ''', unsafe_allow_html=True)
                         st.code(printer["ip"])
 
+    if auto_refresh:
+        # espera o próximo push/varredura (ou o intervalo) e só então reexecuta, com a página já desenhada
+        poller.store.wait_for_update(rendered_scans, timeout=refresh_interval)
+        st.rerun()
+
 def render_tvs_monitores():
     """Renderiza a página de TVs e Monitores"""
     st.markdown("""
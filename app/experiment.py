@@ -1,92 +1,190 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
-def simulate(policy: Dict, df_txn: pd.DataFrame, df_cust: pd.DataFrame, n_boot: int = 200) -> Dict:
-    """Run a tiny policy simulation with bootstrap CIs.
+# Max index-matrix elements drawn at once per worker (~64 MB of int64 indices)
+BOOT_CHUNK_ELEMS = 1 << 23
 
-    Supported policies
-    ------------------
-    - {"type": "limit_uplift", "segment": "B", "pct": 0.10}
-    - {"type": "fraud_threshold", "old": 0.7, "new": 0.6}
-    - {"type": "rewards_tweak", "category": "groceries", "old": 0.01, "new": 0.02}
+def _boot_sums_chunk(values: np.ndarray, n_boot: int, seed) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = len(values)
+    rows = max(1, BOOT_CHUNK_ELEMS // max(n, 1))
+    out = np.empty(n_boot)
+    for start in range(0, n_boot, rows):
+        k = min(rows, n_boot - start)
+        idx = rng.integers(0, n, size=(k, n))
+        out[start:start + k] = values[idx].sum(axis=1)
+    return out
 
-    Returns
-    -------
-    dict with delta_revenue, delta_risk, ci
+def bootstrap_sums(values: np.ndarray, n_boot: int, seed: int = 11, n_jobs: int = 1) -> np.ndarray:
+    """Sums of ``n_boot`` with-replacement resamples of ``values``.
+
+    Resamples are drawn as index matrices in memory-bounded chunks and summed
+    with NumPy. With ``n_jobs > 1`` the boots are split across a process pool,
+    each worker seeded from an independent ``SeedSequence`` child.
+
+    Examples
+    --------
+    >>> bootstrap_sums(np.ones(10), n_boot=3).tolist()
+    [10.0, 10.0, 10.0]
     """
-    # Baseline revenue approximation
-    rev_base = (df_txn["amount"] * df_txn["fee_rate"] * (1 - df_txn["is_refund"])).sum()
-    risk_base = df_txn["label_fraud"].mean()
+    values = np.asarray(values, dtype=float)
+    if n_boot <= 0 or len(values) == 0:
+        return np.zeros(max(n_boot, 0))
+    if n_jobs <= 1:
+        return _boot_sums_chunk(values, n_boot, seed)
+    n_jobs = min(n_jobs, n_boot)
+    seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+    sizes = [len(part) for part in np.array_split(np.arange(n_boot), n_jobs)]
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        parts = pool.map(_boot_sums_chunk, [values] * n_jobs, sizes, seeds)
+        return np.concatenate(list(parts))
+
+def fraud_threshold_arrays(gross_revenue: np.ndarray, label_fraud: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Simulated scores of good txns (sorted) and cumulative ``amount * fee_rate`` in that order.
 
-    def revenue_under(policy):
+    Rows must be in file order: the imaginary scores come from a fixed seed.
+    """
+    # imaginary scores ~ U(0,1) with fraud skew
+    rng = np.random.default_rng(7)
+    scores = rng.random(len(label_fraud)) * (0.6 + 0.8*label_fraud)
+    good = label_fraud == 0
+    order = np.argsort(scores[good], kind="mergesort")
+    good_rev = gross_revenue[good][order]
+    return scores[good][order], np.concatenate([[0.0], np.cumsum(good_rev)])
+
+@dataclass
+class SimulationContext:
+    """Aggregates every policy needs, computed once per data load.
+
+    Policies are evaluated from these arrays/dicts, so no call copies or
+    regroups the transaction frame.
+
+    Examples
+    --------
+    >>> ctx = SimulationContext.from_frames(df_tx, df_cust)   # doctest: +SKIP
+    >>> simulate(policy, df_tx, df_cust, ctx=ctx)            # doctest: +SKIP
+    """
+    n_txn: int
+    rev_base: float
+    risk_base: float
+    fee_mean: float
+    refund_mean: float
+    # per-row baseline revenue, resampled by the bootstrap
+    row_revenue: np.ndarray
+    # limit_uplift: per-customer spend joined onto customers
+    spend_total: float
+    spend_by_segment: Dict[str, float]
+    # rewards_tweak: baseline revenue per category_hint
+    revenue_by_category: Dict[str, float]
+    # fraud_threshold: good txns sorted by simulated score, with cumulative amount*fee
+    good_scores: np.ndarray
+    good_revenue_cum: np.ndarray
+
+    @classmethod
+    def from_frames(cls, df_txn: pd.DataFrame, df_cust: pd.DataFrame) -> "SimulationContext":
+        row_revenue = (df_txn["amount"] * df_txn["fee_rate"] * (1 - df_txn["is_refund"])).to_numpy(dtype=float)
+
+        spend = df_txn.groupby("customer_id")["amount"].sum()
+        joined = df_cust.join(spend, on="customer_id", how="left").fillna({"amount":0.0})
+        spend_by_segment = joined.groupby("risk_segment")["amount"].sum()
+
+        revenue_by_category = pd.Series(row_revenue, index=df_txn.index).groupby(df_txn["category_hint"], observed=True).sum()
+
+        good_scores, good_revenue_cum = fraud_threshold_arrays(
+            (df_txn["amount"] * df_txn["fee_rate"]).to_numpy(dtype=float),
+            df_txn["label_fraud"].to_numpy(),
+        )
+
+        return cls(
+            n_txn=len(df_txn),
+            rev_base=float(row_revenue.sum()),
+            risk_base=float(df_txn["label_fraud"].mean()),
+            fee_mean=float(df_txn["fee_rate"].mean()),
+            refund_mean=float(df_txn["is_refund"].mean()),
+            row_revenue=row_revenue,
+            spend_total=float(joined["amount"].sum()),
+            spend_by_segment={k: float(v) for k, v in spend_by_segment.items()},
+            revenue_by_category={k: float(v) for k, v in revenue_by_category.items()},
+            good_scores=good_scores,
+            good_revenue_cum=good_revenue_cum,
+        )
+
+    def revenue_under(self, policy: Dict) -> float:
         if policy.get("type") == "limit_uplift":
             seg = policy.get("segment", "B")
             pct = float(policy.get("pct", 0.1))
-            affected = df_cust["risk_segment"] == seg
-            uplift_factor = 1 + pct * affected.map({True:1, False:0})
-            # join a crude per-customer spend proxy
-            spend = df_txn.groupby("customer_id")["amount"].sum()
-            joined = df_cust.join(spend, on="customer_id", how="left").fillna({"amount":0.0})
-            new_spend = joined["amount"] * uplift_factor
+            new_spend = self.spend_total + pct * self.spend_by_segment.get(seg, 0.0)
             # revenue proportional to spend
-            return float(new_spend.sum() * df_txn["fee_rate"].mean() * (1 - df_txn["is_refund"].mean()))
+            return float(new_spend * self.fee_mean * (1 - self.refund_mean))
         if policy.get("type") == "rewards_tweak":
             cat = policy.get("category", "groceries")
             old = float(policy.get("old", 0.01))
             new = float(policy.get("new", 0.02))
-            df = df_txn.copy()
-            mask = df["category_hint"] == cat
             # Assume engagement lifts spend by 10% of reward delta on that category
             lift = 1 + 10 * (new - old)
-            df.loc[mask, "amount"] = df.loc[mask, "amount"] * lift
-            return float((df["amount"] * df["fee_rate"] * (1 - df["is_refund"])).sum())
+            return float(self.rev_base + (lift - 1) * self.revenue_by_category.get(cat, 0.0))
         if policy.get("type") == "fraud_threshold":
-            # revenue loss from blocking some good txns; assume 60% of txns above threshold are fraud
-            old_t, new_t = float(policy.get("old", 0.7)), float(policy.get("new", 0.6))
-            df = df_txn.copy()
-            # imaginary scores ~ U(0,1) with fraud skew
-            rng = np.random.default_rng(7)
-            scores = rng.random(len(df)) * (0.6 + 0.8*df["label_fraud"])
-            blocked_old = scores >= old_t
-            blocked_new = scores >= new_t
-            # block revenue for transactions that are NOT fraud
-            good = df["label_fraud"] == 0
-            rev_old = (df.loc[~blocked_old & good, "amount"] * df.loc[~blocked_old & good, "fee_rate"]).sum()
-            rev_new = (df.loc[~blocked_new & good, "amount"] * df.loc[~blocked_new & good, "fee_rate"]).sum()
-            return float(rev_new)
-        return rev_base
-
-    def risk_under(policy):
+            # revenue kept from good txns scoring below the new threshold (the rest are blocked)
+            new_t = float(policy.get("new", 0.6))
+            kept = np.searchsorted(self.good_scores, new_t, side="left")
+            return float(self.good_revenue_cum[kept])
+        return self.rev_base
+
+    def risk_under(self, policy: Dict) -> float:
         if policy.get("type") == "limit_uplift":
-            seg = policy.get("segment", "B")
             pct = float(policy.get("pct", 0.1))
             # More spend -> slight fraud exposure increase
-            return float(risk_base * (1 + 0.2 * pct))
+            return float(self.risk_base * (1 + 0.2 * pct))
         if policy.get("type") == "rewards_tweak":
             # neutral risk
-            return float(risk_base)
+            return float(self.risk_base)
         if policy.get("type") == "fraud_threshold":
             old_t, new_t = float(policy.get("old", 0.7)), float(policy.get("new", 0.6))
             # Lower threshold => catch more fraud
-            return float(max(0.0, risk_base - 0.05 * (new_t - old_t) / 0.1))
-        return float(risk_base)
+            return float(max(0.0, self.risk_base - 0.05 * (new_t - old_t) / 0.1))
+        return float(self.risk_base)
+
+def simulate(policy: Dict, df_txn: pd.DataFrame, df_cust: pd.DataFrame, n_boot: int = 200,
+             n_jobs: int = 1, ctx: Optional[SimulationContext] = None) -> Dict:
+    """Run a tiny policy simulation with bootstrap CIs.
+
+    ``n_jobs > 1`` spreads the bootstrap across worker processes (worth it
+    for large ``n_boot`` on large frames). Pass a prebuilt ``ctx`` to skip
+    recomputing the aggregates on every call.
+
+    Supported policies
+    ------------------
+    - {"type": "limit_uplift", "segment": "B", "pct": 0.10}
+    - {"type": "fraud_threshold", "old": 0.7, "new": 0.6}
+    - {"type": "rewards_tweak", "category": "groceries", "old": 0.01, "new": 0.02}
+
+    Returns
+    -------
+    dict with delta_revenue, delta_risk, ci
+    """
+    if ctx is None:
+        ctx = SimulationContext.from_frames(df_txn, df_cust)
 
+    # Bootstrap CI on revenue (risk assumed deterministic in this toy).
+    # The policy revenue is computed on the full data, so only the baseline
+    # is resampled and each boot is a sum of per-row revenue.
+    base_boots = bootstrap_sums(ctx.row_revenue, n_boot, seed=11, n_jobs=n_jobs)
+    return _evaluate(policy, ctx, base_boots)
+
+def _evaluate(policy: Dict, ctx: SimulationContext, base_boots: np.ndarray) -> Dict:
     # Point estimates
-    rev_new = revenue_under(policy)
-    risk_new = risk_under(policy)
-    delta_revenue = float(rev_new - rev_base)
-    delta_risk = float(risk_new - risk_base)
-
-    # Bootstrap CI on revenue (risk assumed deterministic in this toy)
-    rng = np.random.default_rng(11)
-    boots = []
-    idx = np.arange(len(df_txn))
-    for _ in range(n_boot):
-        samp = df_txn.iloc[rng.choice(idx, size=len(idx), replace=True)]
-        boots.append(revenue_under(policy) - (samp["amount"] * samp["fee_rate"] * (1 - samp["is_refund"])).sum())
+    rev_new = ctx.revenue_under(policy)
+    risk_new = ctx.risk_under(policy)
+    delta_revenue = float(rev_new - ctx.rev_base)
+    delta_risk = float(risk_new - ctx.risk_base)
+
+    boots = rev_new - base_boots
     lo, hi = np.percentile(boots, [5, 95]) if len(boots)>1 else (delta_revenue, delta_revenue)
 
     return {
@@ -95,3 +193,29 @@ def simulate(policy: Dict, df_txn: pd.DataFrame, df_cust: pd.DataFrame, n_boot:
         "delta_risk": delta_risk,
         "ci_90": [float(lo), float(hi)]
     }
+
+def expand_grid(base: Dict, grid: Dict[str, List]) -> List[Dict]:
+    """Cartesian product of ``grid`` values layered over ``base``.
+
+    Examples
+    --------
+    >>> expand_grid({"type": "limit_uplift"}, {"pct": [0.1, 0.2], "segment": ["A"]})
+    [{'type': 'limit_uplift', 'pct': 0.1, 'segment': 'A'}, {'type': 'limit_uplift', 'pct': 0.2, 'segment': 'A'}]
+    """
+    keys = list(grid)
+    return [{**base, **dict(zip(keys, combo))} for combo in itertools.product(*(grid[k] for k in keys))]
+
+def simulate_sweep(policies: List[Dict], df_txn: pd.DataFrame, df_cust: pd.DataFrame, n_boot: int = 200,
+                   n_jobs: int = 1, ctx: Optional[SimulationContext] = None) -> Iterator[Dict]:
+    """Evaluate many policies against one context and one bootstrap sample set.
+
+    The baseline resamples are drawn once and shared, so each policy after the
+    first costs a few aggregate lookups plus two percentiles. Results are
+    yielded in input order as they are computed, each with its grid ``index``.
+    """
+    if ctx is None:
+        ctx = SimulationContext.from_frames(df_txn, df_cust)
+    base_boots = bootstrap_sums(ctx.row_revenue, n_boot, seed=11, n_jobs=n_jobs)
+    for i, policy in enumerate(policies):
+        yield {"index": i, **_evaluate(policy, ctx, base_boots)}
+
@@ -1,29 +1,87 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, List, Tuple
 import pandas as pd
 
-def load_data(data_dir: str | Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
+# Parquet/Feather caches (optional; plain CSV is used without pyarrow)
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+COLUMNAR_FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+
+TX_DTYPES: Dict[str, str] = {
+    "channel": "category",
+    "country": "category",
+    "category_hint": "category",
+    "mcc": "int32",
+}
+CUST_DTYPES: Dict[str, str] = {}
+
+def _read_csv_typed(csv_path: Path, parse_dates: List[str], dtypes: Dict[str, str]) -> pd.DataFrame:
+    df = pd.read_csv(csv_path, parse_dates=parse_dates)
+    # numpy ints can't hold NaN: a column with blanks stays float, as the plain CSV load had it
+    return df.astype({c: t for c, t in dtypes.items() if c in df.columns
+                      and not (pd.api.types.is_integer_dtype(t) and df[c].isna().any())})
+
+def load_table(csv_path: str | Path, parse_dates: List[str], dtypes: Dict[str, str],
+               fmt: str = "parquet") -> pd.DataFrame:
+    """Load one CSV through a typed columnar cache sitting next to it.
+
+    The cache (``<name>.parquet`` or ``<name>.feather``) is rebuilt whenever
+    the CSV is newer than it, so editing the CSV is enough to refresh it.
+    ``fmt="csv"`` (or a missing pyarrow) always parses the CSV.
+    """
+    csv_path = Path(csv_path)
+    if fmt == "csv" or not HAS_PYARROW:
+        return _read_csv_typed(csv_path, parse_dates, dtypes)
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected csv, parquet or feather")
+    cache = csv_path.with_suffix(COLUMNAR_FORMATS[fmt])
+    if cache.exists() and cache.stat().st_mtime >= csv_path.stat().st_mtime:
+        return pd.read_parquet(cache) if fmt == "parquet" else pd.read_feather(cache)
+
+    df = _read_csv_typed(csv_path, parse_dates, dtypes)
+    tmp = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+    try:
+        if fmt == "parquet":
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_feather(tmp)
+        # atomic swap so concurrent workers never read a half-written cache
+        os.replace(tmp, cache)
+    except OSError:
+        # read-only data dir: serve from the CSV without caching
+        tmp.unlink(missing_ok=True)
+    return df
+
+def load_data(data_dir: str | Path, fmt: str = "parquet") -> Tuple[pd.DataFrame, pd.DataFrame]:
     """Load transactions and customers dataframes.
 
     Parameters
     ----------
     data_dir : str | Path
         Directory containing CSV files.
+    fmt : str
+        ``"parquet"`` (default) or ``"feather"`` to read through a typed
+        columnar cache converted from the CSVs; ``"csv"`` to always parse.
 
     Returns
     -------
     (df_tx, df_cust)
     """
     data_dir = Path(data_dir)
-    df_tx = pd.read_csv(data_dir / "transactions_small.csv", parse_dates=["ts"])
-    df_cust = pd.read_csv(data_dir / "customers_small.csv", parse_dates=["join_date"])
+    df_tx = load_table(data_dir / "transactions_small.csv", ["ts"], TX_DTYPES, fmt)
+    df_cust = load_table(data_dir / "customers_small.csv", ["join_date"], CUST_DTYPES, fmt)
     return df_tx, df_cust
 
 def basic_eda(df_tx: pd.DataFrame) -> pd.DataFrame:
     """Return a small summary table by channel and category hint."""
-    g = df_tx.groupby(["channel", "category_hint"]).agg(
+    g = df_tx.groupby(["channel", "category_hint"], observed=True).agg(
         n=("txn_id","count"),
         avg_amt=("amount","mean"),
         fraud_rate=("label_fraud","mean")
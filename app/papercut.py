@@ -0,0 +1,287 @@
+"""
+Busca de páginas do PaperCut com cache e sincronização incremental
+As páginas candidatas são baixadas em paralelo na sessão autenticada; as que
+trazem dados de impressoras ficam memorizadas como "conhecidas", e os
+registros extraídos de cada página ficam em cache com ETag/Last-Modified e TTL.
+Cada sync é comparado com o snapshot anterior e só as diferenças são aplicadas.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+PAGE_TTL = 300            # segundos em que uma página é reaproveitada sem nenhuma requisição
+PAGE_TIMEOUT = 20
+MAX_WORKERS = 8           # abaixo do pool padrão do requests (10 conexões por host)
+MIN_PAGE_SIZE = 500
+MIN_INDICATORS = 3
+PRINTER_INDICATORS = (
+    '172.', 'printer', 'epson', 'hp', 'canon', 'pages', 'páginas',
+    'toner', 'ink', 'status', 'online', 'offline', 'device',
+)
+
+def count_printer_indicators(html: str) -> int:
+    content = html.lower()
+    return sum(1 for indicator in PRINTER_INDICATORS if indicator in content)
+
+@dataclass
+class CachedPage:
+    fetched_at: float
+    records: Dict[str, Dict] = field(default_factory=dict)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+class PaperCutPageCache:
+    """Registros por URL e URLs que já retornaram impressoras, por servidor"""
+
+    def __init__(self, ttl: float = PAGE_TTL):
+        self.ttl = ttl
+        self.pages: Dict[str, CachedPage] = {}
+        self.known_good: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            return self.pages.get(url)
+
+    def put(self, url: str, page: CachedPage) -> None:
+        with self._lock:
+            self.pages[url] = page
+
+    def clear(self) -> None:
+        with self._lock:
+            self.pages.clear()
+            self.known_good.clear()
+
+def _fetch(session: requests.Session, url: str, cached: Optional[CachedPage], timeout: float) -> Tuple[str, object]:
+    """Baixa uma página (rede apenas, sem parsing); retorna (resultado, dado)"""
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+    try:
+        response = session.get(url, headers=headers, verify=False, timeout=timeout)
+    except requests.RequestException as e:
+        return "erro", str(e)[:50]
+    if response.status_code == 304 and cached is not None:
+        return "inalterada", None
+    if response.status_code != 200 or len(response.text) <= MIN_PAGE_SIZE:
+        return "vazia", f"Status {response.status_code} ou conteúdo insuficiente"
+    found = count_printer_indicators(response.text)
+    if found < MIN_INDICATORS:
+        return "vazia", f"Poucos indicadores encontrados ({found}/10)"
+    return "nova", response
+
+def fetch_printer_pages(session: requests.Session, urls: List[str], parse: Callable[[str, str], Dict[str, Dict]],
+                        cache: PaperCutPageCache, server_key: str, timeout: float = PAGE_TIMEOUT,
+                        max_workers: int = MAX_WORKERS, refresh: bool = False) -> Tuple[Dict[str, Dict], List[Tuple[str, str, int, str]]]:
+    """Busca as páginas de impressoras do PaperCut e devolve (registros, relatório).
+
+    Só as URLs conhecidas de ``server_key`` são consultadas quando existem
+    (``refresh=True`` testa todas de novo). Páginas dentro do TTL não geram
+    requisição, e as demais são revalidadas por ETag: um 304 reaproveita os
+    registros em cache. O download é paralelo, mas ``parse`` roda na thread
+    chamadora, uma vez por página nova. O relatório lista ``(url, resultado,
+    nº de registros, detalhe)``, com resultado em cache/inalterada/nova/vazia/erro.
+    """
+    known = cache.known_good.get(server_key)
+    candidates = urls if refresh or not known else known
+    now = time.time()
+
+    to_fetch, report = [], {}
+    for url in candidates:
+        cached = cache.get(url)
+        if cached is not None and now - cached.fetched_at < cache.ttl:
+            report[url] = ("cache", len(cached.records), "")
+        else:
+            to_fetch.append(url)
+
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(to_fetch))) as pool:
+            fetched = list(pool.map(lambda u: _fetch(session, u, cache.get(u), timeout), to_fetch))
+    else:
+        fetched = []
+
+    for url, (outcome, payload) in zip(to_fetch, fetched):
+        cached = cache.get(url)
+        if outcome == "inalterada":
+            cached.fetched_at = now
+            report[url] = (outcome, len(cached.records), "")
+        elif outcome == "nova":
+            records = parse(payload.text, url) or {}
+            cache.put(url, CachedPage(now, records, payload.headers.get('ETag'), payload.headers.get('Last-Modified')))
+            report[url] = (outcome, len(records), "")
+        elif cached is not None and (outcome == "erro" or cached.records):
+            # falha de rede ou resposta transitória (500, tela de login) numa página que já
+            # trouxe impressoras: manter os registros anteriores e tentar de novo no próximo
+            # sync, senão o diff as daria como removidas
+            report[url] = (outcome, len(cached.records), payload)
+        else:
+            # sem dados: cache negativo até o TTL, para não insistir a cada sync
+            cache.put(url, CachedPage(now))
+            report[url] = (outcome, 0, payload)
+
+    printers: Dict[str, Dict] = {}
+    good = []
+    for url in candidates:
+        page = cache.get(url)
+        if page is not None and page.records:
+            printers.update(page.records)
+            good.append(url)
+    with cache._lock:
+        if good:
+            cache.known_good[server_key] = good
+        else:
+            # nada encontrado: voltar a testar a lista completa na próxima vez
+            cache.known_good.pop(server_key, None)
+    return printers, [(url, *report[url]) for url in candidates]
+
+_cache: Optional[PaperCutPageCache] = None
+_cache_lock = threading.Lock()
+
+def get_page_cache() -> PaperCutPageCache:
+    """Cache único do processo (sobrevive aos reruns do Streamlit)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PaperCutPageCache()
+        return _cache
+
+# ========== SINCRONIZAÇÃO INCREMENTAL ==========
+
+SNAPSHOT_FILE = "papercut_snapshot.json"
+CHANGELOG_SIZE = 200
+# Campos que mudam a cada leitura sem representar mudança na impressora
+VOLATILE_FIELDS = ("ultima_atualizacao",)
+
+def record_key(record: Dict) -> Optional[str]:
+    """Identidade de um registro: serial quando existir, senão IP"""
+    return record.get("serial") or record.get("ip")
+
+def diff_records(old: Dict[str, Dict], new: Dict[str, Dict]) -> Dict:
+    """Compara snapshots ``{chave: registro}``.
+
+    Retorna ``added`` (registros novos), ``changed`` (``{chave: {campo:
+    valor_novo}}``, só os campos alterados) e ``removed`` (chaves que sumiram).
+    """
+    added, changed = {}, {}
+    for key, rec in new.items():
+        before = old.get(key)
+        if before is None:
+            added[key] = rec
+            continue
+        fields = {f: v for f, v in rec.items() if f not in VOLATILE_FIELDS and before.get(f) != v}
+        if fields:
+            changed[key] = fields
+    removed = [key for key in old if key not in new]
+    return {"added": added, "changed": changed, "removed": removed}
+
+def apply_to_rows(rows: Iterable[Dict], change: Dict, fields: Dict[str, str]) -> int:
+    """Aplica um diff a linhas da tabela de impressoras (casadas por serial ou IP).
+
+    ``fields`` mapeia campo do PaperCut -> coluna da tabela; só as colunas
+    cujos campos mudaram são escritas. Retorna quantas linhas foram alteradas.
+    """
+    updates = {k: {f: v for f, v in rec.items() if f in fields} for k, rec in change["added"].items()}
+    for key, rec in change["changed"].items():
+        updates.setdefault(key, {}).update({f: v for f, v in rec.items() if f in fields})
+    touched = 0
+    for row in rows:
+        upd = updates.get(row.get("serial")) or updates.get(row.get("ip"))
+        if upd:
+            row.update({fields[f]: v for f, v in upd.items()})
+            touched += 1
+    return touched
+
+class PaperCutSync:
+    """Snapshot persistido dos registros do PaperCut com log de mudanças.
+
+    ``apply`` recebe os registros recém-extraídos, calcula o diff contra o
+    snapshot, aplica só os campos alterados e grava snapshot e log num JSON
+    compacto (arquivo temporário + rename).
+    """
+
+    def __init__(self, path: str | Path = SNAPSHOT_FILE, log_size: int = CHANGELOG_SIZE):
+        self.path = Path(path)
+        self.snapshot: Dict[str, Dict] = {}
+        self.changelog: deque = deque(maxlen=log_size)
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                saved = json.loads(self.path.read_text(encoding="utf-8"))
+                self.snapshot = saved.get("snapshot", {})
+                self.changelog.extend(saved.get("changelog", []))
+            except (OSError, ValueError):
+                pass
+
+    def apply(self, records: Dict[str, Dict]) -> Dict:
+        """Mescla um sync completo ``{nome: registro}``; retorna a entrada do log de mudanças"""
+        fresh = {}
+        for rec in records.values():
+            key = record_key(rec)
+            if key:
+                fresh[key] = rec
+        with self._lock:
+            change = diff_records(self.snapshot, fresh)
+            for key, rec in change["added"].items():
+                self.snapshot[key] = dict(rec)
+            for key, fields in change["changed"].items():
+                self.snapshot[key].update(fields)
+            change["removed_ips"] = [self.snapshot[key].get("ip", key) for key in change["removed"]]
+            for key in change["removed"]:
+                del self.snapshot[key]
+            change["timestamp"] = datetime.now().isoformat()
+            change["counts"] = {k: len(change[k]) for k in ("added", "changed", "removed")}
+            self.changelog.append(change)
+            self._save()
+        return change
+
+    def _save(self) -> None:
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps({"snapshot": self.snapshot, "changelog": list(self.changelog)},
+                                      ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+    def delta_payload(self, change: Dict) -> Dict:
+        """Payload para ``api_sync.receive_ping_results`` com apenas o que mudou"""
+        results, details = {}, {}
+        for key in list(change["added"]) + list(change["changed"]):
+            rec = self.snapshot[key]
+            ip = rec.get("ip", key)
+            status = str(rec.get("status", ""))
+            results[ip] = {"online": "online" in status.lower(), "status": status,
+                           "timestamp": change["timestamp"], "method": "papercut"}
+            details[ip] = rec
+        return {
+            "mode": "delta",
+            "results": results,
+            "printer_details": details,
+            "removed": change["removed_ips"],
+            "timestamp": change["timestamp"],
+            "source": "papercut",
+        }
+
+_sync: Optional[PaperCutSync] = None
+
+def get_papercut_sync(path: str | Path = SNAPSHOT_FILE) -> PaperCutSync:
+    """Snapshot único do processo"""
+    global _sync
+    with _cache_lock:
+        if _sync is None:
+            _sync = PaperCutSync(path)
+        return _sync
@@ -0,0 +1,161 @@
+"""
+Histórico de status das impressoras (série temporal em SQLite)
+Cada scan vira uma linha compacta por impressora; amostras antigas são
+agregadas por hora e as muito antigas descartadas, como um ring buffer.
+Uptime e previsão de fim de tinta saem daqui sem novo scan.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DB = "printer_history.sqlite"
+INK_COLORS = ("black", "cyan", "magenta", "yellow")
+RAW_RETENTION = 7 * 86400        # amostras brutas: 7 dias
+HOURLY_RETENTION = 365 * 86400   # agregados por hora: 1 ano
+MAINTAIN_EVERY = 3600
+
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS samples (
+    ip TEXT NOT NULL, ts REAL NOT NULL, online INTEGER NOT NULL, latency REAL,
+    {", ".join(f"{c} REAL" for c in INK_COLORS)},
+    PRIMARY KEY (ip, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hourly (
+    ip TEXT NOT NULL, ts REAL NOT NULL, n INTEGER NOT NULL, n_online INTEGER NOT NULL, latency REAL,
+    {", ".join(f"{c} REAL" for c in INK_COLORS)},
+    PRIMARY KEY (ip, ts)
+) WITHOUT ROWID;
+"""
+
+def _ink_value(levels: Optional[Dict], color: str) -> Optional[float]:
+    match = _PERCENT.match(str((levels or {}).get(color, "")))
+    return float(match.group(1)) if match else None
+
+class PrinterHistory:
+    """Série temporal de ping e tinta por impressora.
+
+    ``samples`` guarda cada scan dos últimos ``raw_retention`` segundos; o que
+    passa disso é resumido por hora em ``hourly`` (contagens de online,
+    latência média e menor nível de tinta) e apagado. As consultas leem as
+    duas tabelas, então o intervalo pode atravessar a fronteira.
+    """
+
+    def __init__(self, db_path: str | Path = DEFAULT_DB, raw_retention: float = RAW_RETENTION,
+                 hourly_retention: float = HOURLY_RETENTION):
+        self.db_path = str(db_path)
+        self.raw_retention = raw_retention
+        self.hourly_retention = hourly_retention
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(self.db_path, check_same_thread=False)
+        if self.db_path != ":memory:":
+            self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(_SCHEMA)
+        self._last_maintain = 0.0
+
+    def record(self, results: Dict[str, Dict], ts: Optional[float] = None) -> int:
+        """Grava um scan ``{ip: resultado}`` (formato de ``printer_scan``); retorna nº de linhas"""
+        ts = time.time() if ts is None else ts
+        rows = [(ip, ts, int(bool(r.get("online"))), r.get("latency"),
+                 *(_ink_value(r.get("ink_levels"), c) for c in INK_COLORS))
+                for ip, r in results.items()]
+        with self._lock, self._con:
+            self._con.executemany(
+                f"INSERT OR REPLACE INTO samples VALUES ({', '.join('?' * (4 + len(INK_COLORS)))})", rows)
+        if ts - self._last_maintain >= MAINTAIN_EVERY:
+            self.downsample(now=ts)
+        return len(rows)
+
+    def downsample(self, now: Optional[float] = None) -> None:
+        """Agrega por hora as amostras mais antigas que ``raw_retention`` e poda o histórico"""
+        now = time.time() if now is None else now
+        # só horas completas, para um balde nunca ser agregado duas vezes
+        cutoff = (now - self.raw_retention) // 3600 * 3600
+        inks = ", ".join(f"min({c})" for c in INK_COLORS)
+        with self._lock, self._con:
+            self._con.execute(f"""
+                INSERT OR REPLACE INTO hourly
+                SELECT ip, CAST(ts / 3600 AS INTEGER) * 3600.0 AS hour, count(*), sum(online), avg(latency), {inks}
+                FROM samples WHERE ts < ? GROUP BY ip, hour
+            """, (cutoff,))
+            self._con.execute("DELETE FROM samples WHERE ts < ?", (cutoff,))
+            self._con.execute("DELETE FROM hourly WHERE ts < ?", (now - self.hourly_retention,))
+        self._last_maintain = now
+
+    def _union(self, start: float, end: float, ips: Optional[Iterable[str]]) -> tuple:
+        """SQL que junta brutas e agregadas como (ip, ts, n, n_online, latency, cores...)"""
+        cols = ", ".join(INK_COLORS)
+        where, params = "ts >= ? AND ts < ?", [start, end]
+        if ips is not None:
+            ips = list(ips)
+            where += f" AND ip IN ({', '.join('?' * len(ips))})"
+            params += ips
+        sql = f"""
+            SELECT ip, ts, 1 AS n, online AS n_online, latency, {cols} FROM samples WHERE {where}
+            UNION ALL
+            SELECT ip, ts, n, n_online, latency, {cols} FROM hourly WHERE {where}
+        """
+        return sql, params + params
+
+    def range(self, start: float, end: Optional[float] = None, ips: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Histórico entre ``start`` e ``end`` (epoch), ordenado por ip e tempo"""
+        sql, params = self._union(start, time.time() + 1 if end is None else end, ips)
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT * FROM ({sql}) ORDER BY ip, ts", self._con, params=params)
+        df["time"] = pd.to_datetime(df["ts"], unit="s")
+        return df
+
+    def uptime(self, start: float, end: Optional[float] = None, ips: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Percentual de scans online por impressora no intervalo"""
+        sql, params = self._union(start, time.time() + 1 if end is None else end, ips)
+        with self._lock:
+            rows = self._con.execute(
+                f"SELECT ip, sum(n_online) * 100.0 / sum(n) FROM ({sql}) GROUP BY ip", params).fetchall()
+        return {ip: round(pct, 1) for ip, pct in rows}
+
+    def ink_forecast(self, window: float = 14 * 86400, now: Optional[float] = None,
+                     ips: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Previsão de fim de tinta por impressora e cor.
+
+        Ajusta uma reta ao nível de cada cor na janela ``window`` (desde a
+        última troca de cartucho, quando o nível sobe) e devolve o nível
+        atual, o consumo por dia e em quantos dias chega a zero. Só as linhas
+        com leitura de tinta saem do SQLite (os scans de status não têm).
+        """
+        now = time.time() if now is None else now
+        sql, params = self._union(now - window, now + 1, ips)
+        has_ink = " OR ".join(f"{c} IS NOT NULL" for c in INK_COLORS)
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT ip, ts, {', '.join(INK_COLORS)} FROM ({sql}) WHERE {has_ink} ORDER BY ip, ts",
+                                   self._con, params=params)
+        out = []
+        for ip, g in df.groupby("ip", sort=True):
+            for color in INK_COLORS:
+                s = g[["ts", color]].dropna()
+                if len(s) < 2:
+                    continue
+                ts, level = s["ts"].to_numpy(), s[color].to_numpy()
+                # recomeçar a série depois de uma troca de cartucho
+                refill = np.flatnonzero(np.diff(level) > 5)
+                if refill.size:
+                    ts, level = ts[refill[-1] + 1:], level[refill[-1] + 1:]
+                if len(ts) < 2 or ts[-1] == ts[0]:
+                    continue
+                per_day = -np.polyfit(ts, level, 1)[0] * 86400
+                days_left = level[-1] / per_day if per_day > 0 else float("inf")
+                out.append({"ip": ip, "color": color, "level": float(level[-1]),
+                            "per_day": round(float(per_day), 3), "days_left": round(float(days_left), 1)})
+        return pd.DataFrame(out, columns=["ip", "color", "level", "per_day", "days_left"])
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
@@ -0,0 +1,117 @@
+"""
+Leitura dos níveis de tinta das impressoras Epson via HTTP
+Sessões keep-alive por host, regex pré-compiladas, busca em paralelo para a
+frota toda e memória de qual URL de status funciona para cada modelo.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# URLs comuns de status para Epson WF-C5790, na ordem em que são tentadas
+INK_PATHS = (
+    "/PRESENTATION/HTML/TOP/PRTINFO.HTML",
+    "/PRESENTATION/HTML/TOP/TOP.HTML",
+    "/cgi-bin/inkjetStatus",
+    "/status",
+    "/ink_level",
+)
+
+# Padrões comuns para níveis de tinta Epson (compilados uma única vez)
+INK_PATTERNS = {
+    "black": re.compile(r"black.*?(\d+)%", re.IGNORECASE),
+    "cyan": re.compile(r"cyan.*?(\d+)%", re.IGNORECASE),
+    "magenta": re.compile(r"magenta.*?(\d+)%", re.IGNORECASE),
+    "yellow": re.compile(r"yellow.*?(\d+)%", re.IGNORECASE),
+}
+
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_WORKERS = 32
+
+def parse_ink_levels(html: str) -> Dict[str, str]:
+    """Extrai as porcentagens de cada cor do HTML da página de status"""
+    ink_info = {color: "N/A" for color in INK_PATTERNS}
+    content = html.lower()
+    if "ink" in content or "tinta" in content:
+        for color, pattern in INK_PATTERNS.items():
+            match = pattern.search(content)
+            if match:
+                ink_info[color] = f"{match.group(1)}%"
+    return ink_info
+
+class InkFetcher:
+    """Busca níveis de tinta reaproveitando conexões e a URL que já funcionou.
+
+    ``known_paths`` guarda, por modelo (ou por IP quando o modelo não é
+    informado), o caminho que respondeu 200; as próximas consultas vão direto
+    nele e só voltam a testar a lista completa se ele falhar.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, max_workers: int = DEFAULT_WORKERS):
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.known_paths: Dict[str, str] = {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _session(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _candidates(self, key: str) -> Tuple[str, ...]:
+        known = self.known_paths.get(key)
+        if known is None:
+            return INK_PATHS
+        return (known,) + tuple(p for p in INK_PATHS if p != known)
+
+    def fetch(self, ip: str, model: Optional[str] = None) -> Dict[str, str]:
+        """Níveis de tinta de uma impressora (mesmo formato do antigo ``get_ink_levels``)"""
+        key = model or ip
+        session = self._session(ip)
+        for path in self._candidates(key):
+            try:
+                response = session.get(f"http://{ip}{path}", timeout=self.timeout)
+            except requests.RequestException:
+                continue
+            if response.status_code == 200:
+                with self._lock:
+                    self.known_paths[key] = path
+                return parse_ink_levels(response.text)
+        return {"status": "Sem acesso web"}
+
+    def fetch_many(self, printers: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Dict[str, str]]:
+        """Busca todas as impressoras ``(ip, modelo)`` em paralelo; retorna {ip: níveis}"""
+        printers = list(dict.fromkeys((ip, model) for ip, model in printers if ip and ip != "N/A"))
+        if not printers:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(printers))) as pool:
+            results = pool.map(lambda p: self.fetch(*p), printers)
+            return {ip: levels for (ip, _), levels in zip(printers, results)}
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+_fetcher: Optional[InkFetcher] = None
+_fetcher_lock = threading.Lock()
+
+def get_ink_fetcher() -> InkFetcher:
+    """Fetcher único do processo, para que pools e URLs conhecidas sejam compartilhados"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = InkFetcher()
+        return _fetcher
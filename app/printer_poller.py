@@ -0,0 +1,222 @@
+"""
+Poller de status das impressoras em segundo plano
+Uma única thread por processo varre a frota periodicamente e grava num store
+compartilhado; todas as sessões do Streamlit apenas leem esse store.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from .printer_history import MAINTAIN_EVERY, PrinterHistory
+from .printer_ink import get_ink_fetcher
+from .printer_scan import DEFAULT_TIMEOUT, scan_printers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV = "template_impressoras_exemplo.csv"
+DEFAULT_INTERVAL = 30.0
+# nível de tinta muda em dias: buscar bem menos que o status, para não pesar na VLAN
+INK_INTERVAL = 20 * 60.0
+
+class PrinterStatusStore:
+    """Último resultado de scan por IP, protegido por lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._status: Dict[str, Dict] = {}
+        self.updated_at: Optional[float] = None
+        self.scans = 0
+
+    def update(self, results: Dict[str, Dict]) -> None:
+        """Mescla os campos de cada IP (um scan sem tinta mantém o último ``ink_levels``)"""
+        with self._lock:
+            for ip, result in results.items():
+                self._status[ip] = {**self._status.get(ip, {}), **result}
+            self.updated_at = time.time()
+            self.scans += 1
+            self._changed.notify_all()
+
+    def wait_for_update(self, after: int = 0, timeout: Optional[float] = None) -> bool:
+        """Espera até o store ter recebido mais de ``after`` atualizações"""
+        with self._lock:
+            return self._changed.wait_for(lambda: self.scans > after, timeout)
+
+    def get(self, ip: str) -> Optional[Dict]:
+        with self._lock:
+            return self._status.get(ip)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return dict(self._status)
+
+    def online_map(self) -> Dict[str, bool]:
+        """{ip: online} - formato do antigo ``printer_status_cache``"""
+        with self._lock:
+            return {ip: r["online"] for ip, r in self._status.items()}
+
+def load_printer_models(csv_path: str | Path) -> Dict[str, Optional[str]]:
+    """{ip: modelo} a partir das colunas ``ip``/``modelo`` do CSV de impressoras"""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return {row["ip"].strip(): (row.get("modelo") or None)
+                for row in csv.DictReader(f) if (row.get("ip") or "").strip()}
+
+class PrinterPoller:
+    """Thread daemon que reescaneia as impressoras a cada ``interval`` segundos.
+
+    Os IPs vêm do CSV (relido quando o arquivo muda) mais os registrados
+    via ``watch``; ``poll_now`` força uma varredura imediata. Com
+    ``fetch_ink=True`` os níveis de tinta das impressoras online são buscados
+    em paralelo na varredura seguinte a cada ``ink_interval`` segundos e
+    gravados em ``ink_levels``. Com um ``history`` cada varredura também é
+    gravada na série temporal, e a previsão de tinta é recalculada nesta
+    thread (após cada busca de tinta, ou a cada ``MAINTAIN_EVERY``) e fica
+    em ``forecast`` para a página só ler.
+
+    Com ``scan=False`` o status chega por push do agente local (gravado no
+    ``store`` pelo receptor SSE) e a thread não varre a rede: a cada
+    ``interval`` ela grava o store inteiro no histórico, para o uptime
+    continuar proporcional ao tempo, e segue buscando a tinta.
+    """
+
+    def __init__(self, csv_path: str | Path = DEFAULT_CSV, interval: float = DEFAULT_INTERVAL,
+                 timeout: float = DEFAULT_TIMEOUT, store: Optional[PrinterStatusStore] = None,
+                 fetch_ink: bool = False, history: Optional[PrinterHistory] = None,
+                 ink_interval: float = INK_INTERVAL, scan: bool = True):
+        self.csv_path = Path(csv_path)
+        self.interval = interval
+        self.timeout = timeout
+        self.store = store or PrinterStatusStore()
+        self.fetch_ink = fetch_ink
+        self.ink_interval = ink_interval
+        self.history = history
+        self.scan = scan
+        self._last_ink: Optional[float] = None
+        self.forecast: Optional[pd.DataFrame] = None
+        self._forecast_at: Optional[float] = None
+        self._csv_models: Dict[str, Optional[str]] = {}
+        self._csv_mtime: Optional[float] = None
+        self._extra_ips: Dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, ips: Iterable[str]) -> None:
+        """Inclui IPs extras (ex.: impressoras enviadas por upload) nas próximas varreduras"""
+        new = [ip for ip in ips if ip and ip != "N/A" and ip not in self._extra_ips]
+        if new:
+            with self._lock:
+                self._extra_ips.update(dict.fromkeys(new))
+            self._wake.set()
+
+    def ips(self) -> list:
+        try:
+            mtime = os.stat(self.csv_path).st_mtime
+            if mtime != self._csv_mtime:
+                self._csv_models, self._csv_mtime = load_printer_models(self.csv_path), mtime
+        except (OSError, KeyError) as e:
+            logger.debug("CSV de impressoras indisponível: %s", e)
+        with self._lock:
+            return list(dict.fromkeys(list(self._csv_models) + list(self._extra_ips)))
+
+    def ink_due(self) -> bool:
+        return self.fetch_ink and (self._last_ink is None or time.monotonic() - self._last_ink >= self.ink_interval)
+
+    def poll_once(self, ink: Optional[bool] = None) -> Dict[str, Dict]:
+        """Uma varredura; ``ink`` força (ou impede) a busca de tinta, por padrão só quando vencida"""
+        ips = self.ips()
+        if self.scan:
+            results = scan_printers(ips, timeout=self.timeout)
+        else:
+            # amostra do status recebido por push; a tinta antiga não entra de novo no histórico
+            results = {ip: {k: v for k, v in r.items() if k != "ink_levels"}
+                       for ip, r in self.store.snapshot().items()}
+        fetched = False
+        if self.ink_due() if ink is None else ink:
+            online = [(ip, self._csv_models.get(ip)) for ip, r in results.items() if r.get("online")]
+            # sem impressora online (ex.: snapshot do agente ainda não chegou) a busca fica para a próxima
+            if online:
+                for ip, levels in get_ink_fetcher().fetch_many(online).items():
+                    results[ip]["ink_levels"] = levels
+                self._last_ink = time.monotonic()
+                fetched = True
+        if self.history is not None and results:
+            self.history.record(results)
+            self._refresh_forecast(force=fetched)
+        if self.scan:
+            self.store.update(results)
+        elif fetched:
+            # só a tinta: o status no store é do agente e pode ter mudado durante a busca
+            self.store.update({ip: {"ink_levels": r["ink_levels"]} for ip, r in results.items() if "ink_levels" in r})
+        return results
+
+    def _refresh_forecast(self, force: bool = False) -> None:
+        if force or self._forecast_at is None or time.monotonic() - self._forecast_at >= MAINTAIN_EVERY:
+            self.forecast = self.history.ink_forecast()
+            self._forecast_at = time.monotonic()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Falha no scan de impressoras")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "PrinterPoller":
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="printer-poller", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout + 5)
+        self._thread = None
+
+    def wait_for_scan(self, timeout: Optional[float] = None) -> bool:
+        """Espera até existir ao menos um scan completo no store"""
+        return self.store.wait_for_update(0, timeout)
+
+    def poll_now(self, timeout: Optional[float] = None) -> bool:
+        """Acorda a thread para varrer agora e espera o resultado"""
+        start = self.store.scans
+        self._wake.set()
+        return self.store.wait_for_update(start, timeout)
+
+_poller: Optional[PrinterPoller] = None
+_poller_lock = threading.Lock()
+
+def get_poller(csv_path: str | Path = DEFAULT_CSV, interval: float = DEFAULT_INTERVAL,
+               fetch_ink: bool = False, history_path: Optional[str | Path] = None,
+               scan: bool = True, start: bool = True) -> PrinterPoller:
+    """Poller único do processo, iniciado na primeira chamada.
+
+    ``scan=False`` quando o status chega por push do agente local e não deve
+    ser sobrescrito por scans deste processo (histórico e tinta continuam).
+    """
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            history = PrinterHistory(history_path) if history_path else None
+            _poller = PrinterPoller(csv_path, interval, fetch_ink=fetch_ink, history=history, scan=scan)
+            if start:
+                _poller.start()
+        return _poller
@@ -0,0 +1,130 @@
+"""
+Scanner assíncrono de impressoras
+Verifica todas as impressoras ao mesmo tempo com sondas TCP (ICMP opcional),
+com concorrência limitada e timeout por host.
+"""
+from __future__ import annotations
+
+import asyncio
+import platform
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence
+
+# Portas testadas por padrão: JetDirect/RAW (9100) e interface web (80)
+DEFAULT_PORTS = (9100, 80)
+DEFAULT_TIMEOUT = 1.5
+# Máximo de sondas simultâneas (sockets + processos de ping abertos ao mesmo tempo)
+DEFAULT_CONCURRENCY = 256
+
+async def _tcp_probe(ip: str, port: int, timeout: float) -> Optional[float]:
+    """Tenta abrir conexão TCP; retorna a latência em ms ou None"""
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        # RST também prova que o host está de pé, só a porta está fechada
+        return (time.perf_counter() - start) * 1000
+    except (OSError, asyncio.TimeoutError):
+        return None
+    latency = (time.perf_counter() - start) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return latency
+
+async def _icmp_probe(ip: str, timeout: float) -> Optional[float]:
+    """Ping ICMP via binário do sistema (não precisa de raw socket); latência em ms ou None"""
+    wait = max(1, int(round(timeout)))
+    if platform.system().lower() == "windows":
+        cmd = ["ping", "-n", "1", "-w", str(wait * 1000), ip]
+    else:
+        cmd = ["ping", "-c", "1", "-W", str(wait), ip]
+    start = time.perf_counter()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+    except OSError:
+        # ping indisponível ou bloqueado neste ambiente
+        return None
+    try:
+        code = await asyncio.wait_for(proc.wait(), timeout + 1)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return None
+    return (time.perf_counter() - start) * 1000 if code == 0 else None
+
+async def probe_host(ip: str, ports: Sequence[int] = DEFAULT_PORTS, timeout: float = DEFAULT_TIMEOUT,
+                     use_icmp: bool = False, semaphore: Optional[asyncio.Semaphore] = None) -> Dict:
+    """Testa um host disparando todas as sondas em paralelo; a primeira resposta vence"""
+
+    async def limited(coro):
+        if semaphore is None:
+            return await coro
+        async with semaphore:
+            return await coro
+
+    probes = {asyncio.ensure_future(limited(_tcp_probe(ip, port, timeout))): f"tcp:{port}" for port in ports}
+    if use_icmp:
+        probes[asyncio.ensure_future(limited(_icmp_probe(ip, timeout)))] = "icmp"
+
+    result = {"ip": ip, "online": False, "latency": None, "method": None,
+              "timestamp": datetime.now().isoformat()}
+    pending = set(probes)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                latency = task.result()
+                if latency is not None and not result["online"]:
+                    result.update(online=True, latency=round(latency, 1), method=probes[task])
+            if result["online"]:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    return result
+
+async def scan_async(ips: Iterable[str], ports: Sequence[int] = DEFAULT_PORTS, timeout: float = DEFAULT_TIMEOUT,
+                     concurrency: int = DEFAULT_CONCURRENCY, use_icmp: bool = False) -> Dict[str, Dict]:
+    """Varre todos os IPs concorrentemente; retorna {ip: resultado}"""
+    unique = list(dict.fromkeys(ip for ip in ips if ip and ip != "N/A"))
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*(probe_host(ip, ports, timeout, use_icmp, semaphore) for ip in unique))
+    return {r["ip"]: r for r in results}
+
+def scan_printers(ips: Iterable[str], ports: Sequence[int] = DEFAULT_PORTS, timeout: float = DEFAULT_TIMEOUT,
+                  concurrency: int = DEFAULT_CONCURRENCY, use_icmp: bool = False) -> Dict[str, Dict]:
+    """Versão síncrona de ``scan_async`` para uso no Streamlit/Flask.
+
+    A frota inteira leva cerca de uma janela de ``timeout``: hosts que
+    respondem saem em milissegundos e os offline esperam no máximo
+    ``timeout`` segundos, todos ao mesmo tempo.
+    """
+    coro = scan_async(list(ips), ports, timeout, concurrency, use_icmp)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # Já existe um loop nesta thread: executar em uma thread separada
+    box: Dict[str, Dict] = {}
+
+    def runner():
+        box.update(asyncio.run(coro))
+
+    t = threading.Thread(target=runner, daemon=True)
+    t.start()
+    t.join()
+    return box
+
+def scan_printer(ip: str, **kwargs) -> Dict:
+    """Testa uma única impressora"""
+    return scan_printers([ip], **kwargs).get(ip, {"ip": ip, "online": False, "latency": None,
+                                                 "method": None, "timestamp": datetime.now().isoformat()})
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+from .experiment import SimulationContext, fraud_threshold_arrays, simulate
+
+# DuckDB is optional: everything here has a pandas equivalent in ingest/experiment
+try:
+    import duckdb  # type: ignore
+    HAS_DUCKDB = True
+except ImportError:
+    duckdb = None
+    HAS_DUCKDB = False
+
+def _table_source(csv_path: Path) -> str:
+    """SQL table function for ``csv_path``, preferring a fresh Parquet cache beside it."""
+    parquet = csv_path.with_suffix(".parquet")
+    if parquet.exists() and (not csv_path.exists() or parquet.stat().st_mtime >= csv_path.stat().st_mtime):
+        return f"read_parquet('{_quote(parquet)}')"
+    return f"read_csv_auto('{_quote(csv_path)}')"
+
+def _quote(path: str | Path) -> str:
+    return str(path).replace("'", "''")
+
+class DuckDBEngine:
+    """Run EDA and simulation aggregates as SQL directly over the data files.
+
+    The files are exposed as ``transactions`` and ``customers`` views and
+    scanned by DuckDB, which streams and spills to ``temp_directory`` when a
+    query exceeds ``memory_limit``, so tables larger than RAM never become
+    pandas frames.
+
+    Parameters
+    ----------
+    data_dir : str | Path
+        Directory with ``transactions_small.csv`` / ``customers_small.csv``
+        (or their ``.parquet`` caches from ``ingest.load_data``).
+    memory_limit : Optional[str]
+        DuckDB memory cap, e.g. ``"2GB"``.
+    temp_directory : Optional[str | Path]
+        Where DuckDB spills intermediate results.
+
+    Examples
+    --------
+    >>> eng = DuckDBEngine('data')                                    # doctest: +SKIP
+    >>> eng.basic_eda().head()                                        # doctest: +SKIP
+    >>> eng.query("SELECT country, count(*) FROM transactions GROUP BY 1")  # doctest: +SKIP
+    """
+    def __init__(self, data_dir: str | Path, memory_limit: Optional[str] = None,
+                 temp_directory: Optional[str | Path] = None,
+                 tx_file: str = "transactions_small.csv", cust_file: str = "customers_small.csv"):
+        if not HAS_DUCKDB:
+            raise ImportError("duckdb is not installed; use app.ingest / app.experiment instead")
+        data_dir = Path(data_dir)
+        self.con = duckdb.connect()
+        if memory_limit:
+            self.con.execute(f"SET memory_limit = '{_quote(memory_limit)}'")
+        if temp_directory:
+            self.con.execute(f"SET temp_directory = '{_quote(Path(temp_directory))}'")
+        self.con.execute(f"CREATE VIEW transactions AS SELECT * FROM {_table_source(data_dir / tx_file)}")
+        self.con.execute(f"CREATE VIEW customers AS SELECT * FROM {_table_source(data_dir / cust_file)}")
+
+    def query(self, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+        """Ad-hoc SQL over the ``transactions`` / ``customers`` views."""
+        return self.con.execute(sql, params or []).df()
+
+    def basic_eda(self) -> pd.DataFrame:
+        """Same table as ``ingest.basic_eda``, computed out of core."""
+        return self.query("""
+            SELECT channel, category_hint,
+                   count(txn_id) AS n,
+                   avg(amount) AS avg_amt,
+                   avg(label_fraud) AS fraud_rate
+            FROM transactions
+            GROUP BY channel, category_hint
+            ORDER BY channel, category_hint
+        """)
+
+    def simulation_context(self) -> SimulationContext:
+        """Build a ``SimulationContext`` with the aggregates done in SQL.
+
+        Only three narrow per-row columns are fetched (needed by the
+        bootstrap and the score-ordered fraud threshold); the wide
+        transaction table is never materialized.
+        """
+        n, rev_base, risk_base, fee_mean, refund_mean = self.con.execute("""
+            SELECT count(*),
+                   sum(amount * fee_rate * (1 - is_refund)),
+                   avg(label_fraud), avg(fee_rate), avg(is_refund)
+            FROM transactions
+        """).fetchone()
+
+        spend = self.query("""
+            WITH spend AS (
+                SELECT customer_id, sum(amount) AS amount FROM transactions GROUP BY customer_id
+            )
+            SELECT c.risk_segment, sum(coalesce(s.amount, 0.0)) AS amount
+            FROM customers c LEFT JOIN spend s ON c.customer_id = s.customer_id
+            GROUP BY c.risk_segment
+        """)
+        by_category = self.query("""
+            SELECT category_hint, sum(amount * fee_rate * (1 - is_refund)) AS revenue
+            FROM transactions
+            WHERE category_hint IS NOT NULL
+            GROUP BY category_hint
+        """)
+        # file order matters for the seeded fraud scores
+        cols = self.con.execute("""
+            SELECT amount * fee_rate * (1 - is_refund) AS rev,
+                   amount * fee_rate AS gross,
+                   label_fraud
+            FROM transactions
+        """).fetchnumpy()
+        good_scores, good_revenue_cum = fraud_threshold_arrays(
+            np.asarray(cols["gross"], dtype=float), np.asarray(cols["label_fraud"]))
+
+        spend_by_segment: Dict[str, float] = {
+            seg: float(amt) for seg, amt in zip(spend["risk_segment"], spend["amount"]) if pd.notna(seg)}
+        return SimulationContext(
+            n_txn=int(n),
+            rev_base=float(rev_base or 0.0),
+            risk_base=float(risk_base) if risk_base is not None else float("nan"),
+            fee_mean=float(fee_mean) if fee_mean is not None else float("nan"),
+            refund_mean=float(refund_mean) if refund_mean is not None else float("nan"),
+            row_revenue=np.asarray(cols["rev"], dtype=float),
+            spend_total=float(spend["amount"].sum()),
+            spend_by_segment=spend_by_segment,
+            revenue_by_category={str(k): float(v) for k, v in zip(by_category["category_hint"], by_category["revenue"])},
+            good_scores=good_scores,
+            good_revenue_cum=good_revenue_cum,
+        )
+
+    def simulate(self, policy: Dict, n_boot: int = 200, n_jobs: int = 1,
+                 ctx: Optional[SimulationContext] = None) -> Dict:
+        """``experiment.simulate`` fed from SQL aggregates instead of pandas frames."""
+        return simulate(policy, None, None, n_boot=n_boot, n_jobs=n_jobs, ctx=ctx or self.simulation_context())
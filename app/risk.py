@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, Tuple
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
 import numpy as np
 import pandas as pd
 
@@ -11,96 +13,389 @@ class ScorecardModel:
     bins: Dict[str, np.ndarray]
     coefs: Dict[str, float]
     intercept: float
+    # Frozen category vocabulary per categorical feature, learned at train time.
+    # Codes are positions in the Index; unseen categories map to -1.
+    vocab: Dict[str, pd.Index] = field(default_factory=dict)
+
+    def encode(self, f: str, val: np.ndarray) -> np.ndarray:
+        """Stable integer codes for categorical feature ``f`` (independent of the batch)."""
+        # get_indexer reuses the Index's cached hash table: one O(n) lookup
+        return self.vocab[f].get_indexer(val).astype(float)
 
     def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
         x = np.zeros(len(df))
         for f in self.features:
             val = df[f].to_numpy()
-            # Simple monotonic transform: log(1+x)
-            if np.issubdtype(val.dtype, np.number):
+            if f in self.vocab:
+                v = self.encode(f, val)
+            elif np.issubdtype(val.dtype, np.number):
+                # Simple monotonic transform: log(1+x)
                 v = np.log1p(np.maximum(0.0, val))
             else:
-                # one-hot by category order hash
+                # no frozen vocabulary (hand-built model): batch-local order
                 v = pd.Categorical(val).codes.astype(float)
             x += self.coefs.get(f, 0.0) * v
         logits = self.intercept + x
         # sigmoid
         return 1.0 / (1.0 + np.exp(-logits))
 
+def _average_ranks(x: np.ndarray) -> np.ndarray:
+    """1-based ranks of ``x``, ties receiving the mean of their rank range."""
+    order = np.argsort(x)
+    xs = x[order]
+    new_group = np.empty(len(xs), dtype=bool)
+    new_group[:1] = True
+    np.not_equal(xs[1:], xs[:-1], out=new_group[1:])
+    starts = np.flatnonzero(new_group)
+    ends = np.append(starts[1:], len(xs))
+    group_rank = (starts + ends + 1) / 2.0
+    ranks = np.empty(len(xs), dtype=float)
+    ranks[order] = group_rank[np.cumsum(new_group) - 1]
+    return ranks
+
 def auroc(y_true: np.ndarray, y_score: np.ndarray) -> float:
-    # Simple AUC implementation (no sklearn)
-    order = np.argsort(y_score)
-    y = np.array(y_true)[order]
-    n_pos = y.sum()
+    """Rank-based (Mann-Whitney U) AUROC, O(n log n) and tie-aware (no sklearn).
+
+    Examples
+    --------
+    >>> auroc(np.array([0, 0, 1, 1]), np.array([0.1, 0.4, 0.35, 0.8]))
+    0.75
+    """
+    y = np.asarray(y_true) == 1
+    n_pos = int(y.sum())
     n_neg = len(y) - n_pos
     if n_pos == 0 or n_neg == 0:
         return 0.5
-    cum_neg = 0
-    rank_sum = 0.0
-    for i in range(len(y)):
-        if y[i] == 1:
-            rank_sum += cum_neg
-        else:
-            cum_neg += 1
-    return rank_sum / (n_pos * n_neg)
+    ranks = _average_ranks(np.asarray(y_score, dtype=float))
+    u = ranks[y].sum() - n_pos * (n_pos + 1) / 2.0
+    return float(u / (n_pos * n_neg))
+
+def ks_statistic(y_true: np.ndarray, y_score: np.ndarray) -> float:
+    """Exact two-sample KS: max gap between positive and negative score CDFs.
+
+    Scores are sorted once and both empirical CDFs are read off the merged
+    order with cumulative sums, evaluated at the last index of each tie group
+    (no grid approximation).
+    """
+    y = np.asarray(y_true) == 1
+    n_pos = int(y.sum())
+    n_neg = len(y) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return 0.0
+    score = np.asarray(y_score, dtype=float)
+    order = np.argsort(score)
+    ys = y[order]
+    xs = score[order]
+    cdf_pos = np.cumsum(ys) / n_pos
+    cdf_neg = np.cumsum(~ys) / n_neg
+    group_end = np.append(xs[1:] != xs[:-1], True)
+    return float(np.abs(cdf_pos[group_end] - cdf_neg[group_end]).max())
+
+PROTECTED_COLUMNS = ("income_band", "risk_segment", "country")
+# Groups smaller than this are left out of the fairness report
+MIN_FAIRNESS_GROUP = 10
+
+def group_auroc(y_true: np.ndarray, y_score: np.ndarray, groups) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Per-group AUROC, size and positive rate in one vectorized pass.
+
+    One lexsort by (group, score) gives tie-aware ranks within every group;
+    positive rank sums then come from a single ``bincount``. Groups without
+    both classes get 0.5, like ``auroc``.
+
+    Returns
+    -------
+    (group_values, auroc, n, positive_rate), groups sorted by value
+    """
+    codes, uniques = pd.factorize(pd.Series(groups), sort=True)
+    keep = codes >= 0
+    codes = codes[keep]
+    y = (np.asarray(y_true) == 1)[keep]
+    score = np.asarray(y_score, dtype=float)[keep]
+    k = len(uniques)
+
+    order = np.lexsort((score, codes))
+    c, sc, ys = codes[order], score[order], y[order]
+    n = np.bincount(c, minlength=k)
+    group_start = np.concatenate([[0], np.cumsum(n)[:-1]])
+    # tie groups: same group code and same score
+    new_tie = np.empty(len(c), dtype=bool)
+    new_tie[:1] = True
+    new_tie[1:] = (c[1:] != c[:-1]) | (sc[1:] != sc[:-1])
+    starts = np.flatnonzero(new_tie)
+    ends = np.append(starts[1:], len(c))
+    tie_rank = (starts + ends + 1) / 2.0
+    ranks = tie_rank[np.cumsum(new_tie) - 1] - group_start[c]
+
+    n_pos = np.bincount(c, weights=ys, minlength=k)
+    n_neg = n - n_pos
+    rank_pos = np.bincount(c, weights=ranks * ys, minlength=k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        auc = (rank_pos - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg)
+        pos_rate = n_pos / n
+    auc = np.where((n_pos > 0) & (n_neg > 0), auc, 0.5)
+    return np.asarray(uniques), auc, n, pos_rate
+
+def _fairness_rows(values, auc, n, pos_rate) -> list:
+    return [{"band": v.item() if hasattr(v, "item") else v, "auroc": float(a), "positive_rate": float(pr)}
+            for v, a, cnt, pr in zip(values, auc, n, pos_rate) if cnt >= MIN_FAIRNESS_GROUP]
+
+CANDIDATE_FEATURES = ["amount", "installments", "fee_rate", "mcc", "channel", "country"]
+
+def _scorecard_report(model: ScorecardModel, auc: float, ks: float, fairness: Dict, notes: str) -> Dict:
+    # Top drivers (by abs coef)
+    top = sorted(model.coefs.items(), key=lambda kv: abs(kv[1]), reverse=True)[:3]
+    drivers = [f"{k} ({'+' if v>=0 else '-'} impact)" for k,v in top]
+    return {
+        "model": {
+            "features": model.features,
+            "coefs": model.coefs,
+            "intercept": model.intercept,
+            "vocab": {f: [str(c) for c in v] for f, v in model.vocab.items()}
+        },
+        "metrics": {
+            "auroc": float(auc),
+            "ks": float(ks)
+        },
+        "explanation": {
+            "top_drivers": drivers,
+            "notes": notes
+        },
+        "fairness": fairness
+    }
 
-def train_scorecard(df: pd.DataFrame, label: str = "label_fraud") -> Tuple[ScorecardModel, Dict]:
+def train_scorecard(df: pd.DataFrame, label: str = "label_fraud",
+                    protected: Iterable[str] = PROTECTED_COLUMNS) -> Tuple[ScorecardModel, Dict]:
     """Train a tiny, explainable score (no external deps).
 
     Uses a few interpretable transforms and returns a model and a plaintext-ish report.
+    The report's fairness block has per-group AUROC and positive rate for every
+    ``protected`` column found in ``df``.
     """
     # Select up to 6 simple features
-    candidate = ["amount", "installments", "fee_rate", "mcc", "channel", "country"]
-    feat = [f for f in candidate if f in df.columns][:6]
+    feat = [f for f in CANDIDATE_FEATURES if f in df.columns][:6]
     # Coefs: hand-weighted by quick correlation proxy
     coefs = {}
+    vocab = {}
     for f in feat:
         s = df[f]
         if s.dtype.kind in "biufc":
             coefs[f] = float(np.sign(np.corrcoef(np.nan_to_num(s), df[label])[0,1]) * 0.3)
         else:
             coefs[f] = 0.1
+            # sorted categories, same order pd.Categorical would assign
+            vocab[f] = pd.Index(pd.Categorical(s).categories)
     intercept = -2.0
-    model = ScorecardModel(features=feat, bins={}, coefs=coefs, intercept=intercept)
+    model = ScorecardModel(features=feat, bins={}, coefs=coefs, intercept=intercept, vocab=vocab)
     p = model.predict_proba(df)
     auc = auroc(df[label].to_numpy(), p)
-    # KS
-    # simple KS: max diff between positive and negative cdfs
-    pos = np.sort(p[df[label]==1])
-    neg = np.sort(p[df[label]==0])
-    def cdf(x, arr):
-        return (arr <= x).mean() if len(arr)>0 else 0.5
-    grid = np.linspace(0,1,101)
-    ks = float(max(abs(cdf(g,pos)-cdf(g,neg)) for g in grid))
+    ks = ks_statistic(df[label].to_numpy(), p)
 
-    # Top drivers (by abs coef)
-    top = sorted(coefs.items(), key=lambda kv: abs(kv[1]), reverse=True)[:3]
-    drivers = [f"{k} ({'+' if v>=0 else '-'} impact)" for k,v in top]
+    # Fairness check across each protected column present, reusing the global scores
+    fairness = {}
+    y = df[label].to_numpy()
+    for col in protected:
+        if col in df.columns:
+            fairness[col] = _fairness_rows(*group_auroc(y, p, df[col]))
+
+    report = _scorecard_report(model, auc, ks, fairness,
+                               "Simple monotonic transforms; coefficients scaled by correlation sign.")
+    return model, report
+
+class RunningMoments:
+    """Mergeable count, means and (co)moments of (x, y) for a streamed correlation.
+
+    Chunks are combined with the pairwise update of Chan et al., which stays
+    stable where raw sums of squares would cancel.
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m2_x = self.m2_y = self.c_xy = 0.0
+
+    def update(self, x: np.ndarray, y: np.ndarray) -> None:
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if len(x) == 0:
+            return
+        dx, dy = x - x.mean(), y - y.mean()
+        self._combine(len(x), x.mean(), y.mean(), float(dx @ dx), float(dy @ dy), float(dx @ dy))
+
+    def merge(self, other: "RunningMoments") -> None:
+        if other.n:
+            self._combine(other.n, other.mean_x, other.mean_y, other.m2_x, other.m2_y, other.c_xy)
+
+    def _combine(self, n_b, mean_x, mean_y, m2_x, m2_y, c_xy) -> None:
+        n = self.n + n_b
+        dx, dy = mean_x - self.mean_x, mean_y - self.mean_y
+        w = self.n * n_b / n
+        self.m2_x += m2_x + dx * dx * w
+        self.m2_y += m2_y + dy * dy * w
+        self.c_xy += c_xy + dx * dy * w
+        self.mean_x += dx * n_b / n
+        self.mean_y += dy * n_b / n
+        self.n = n
+
+    def corr(self) -> float:
+        denom = np.sqrt(self.m2_x * self.m2_y)
+        return float(self.c_xy / denom) if denom > 0 else float("nan")
+
+class ScoreHistogram:
+    """Mergeable per-label histogram of scores in [0, 1]; an AUROC/KS sketch.
+
+    Metrics are exact up to the bin width: scores sharing a bin count as ties.
+    """
+    def __init__(self, n_bins: int = 4096):
+        self.n_bins = n_bins
+        self.pos = np.zeros(n_bins, dtype=np.int64)
+        self.neg = np.zeros(n_bins, dtype=np.int64)
+
+    def update(self, y_true: np.ndarray, y_score: np.ndarray) -> None:
+        b = np.clip((np.asarray(y_score, dtype=float) * self.n_bins).astype(np.int64), 0, self.n_bins - 1)
+        y = np.asarray(y_true) == 1
+        self.pos += np.bincount(b[y], minlength=self.n_bins)
+        self.neg += np.bincount(b[~y], minlength=self.n_bins)
+
+    def merge(self, other: "ScoreHistogram") -> None:
+        self.pos += other.pos
+        self.neg += other.neg
+
+    @property
+    def n(self) -> int:
+        return int(self.pos.sum() + self.neg.sum())
+
+    @property
+    def n_pos(self) -> int:
+        return int(self.pos.sum())
+
+    def auroc(self) -> float:
+        n_pos, n_neg = self.pos.sum(), self.neg.sum()
+        if n_pos == 0 or n_neg == 0:
+            return 0.5
+        neg_below = np.cumsum(self.neg) - self.neg
+        return float((self.pos * (neg_below + 0.5 * self.neg)).sum() / (n_pos * n_neg))
+
+    def ks(self) -> float:
+        n_pos, n_neg = self.pos.sum(), self.neg.sum()
+        if n_pos == 0 or n_neg == 0:
+            return 0.0
+        return float(np.abs(np.cumsum(self.pos) / n_pos - np.cumsum(self.neg) / n_neg).max())
+
+def csv_chunks(path: str | Path, chunksize: int = 100_000, **read_csv_kwargs) -> Callable[[], Iterator[pd.DataFrame]]:
+    """Re-iterable chunk source over a CSV (``pd.read_csv(chunksize=...)``)."""
+    return lambda: iter(pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs))
+
+def parquet_row_groups(path: str | Path) -> Callable[[], Iterator[pd.DataFrame]]:
+    """Re-iterable chunk source yielding one frame per Parquet row group (needs pyarrow)."""
+    def _iter():
+        import pyarrow.parquet as pq  # type: ignore
+        pf = pq.ParquetFile(path)
+        for i in range(pf.num_row_groups):
+            yield pf.read_row_group(i).to_pandas()
+    return _iter
+
+def train_scorecard_streaming(chunks: Callable[[], Iterable[pd.DataFrame]], label: str = "label_fraud",
+                              n_bins: int = 4096,
+                              protected: Iterable[str] = PROTECTED_COLUMNS) -> Tuple[ScorecardModel, Dict]:
+    """Train the same scorecard as ``train_scorecard`` without holding the data in memory.
+
+    ``chunks`` is called twice and must yield frames each time (see
+    ``csv_chunks`` / ``parquet_row_groups``). Pass 1 accumulates mergeable
+    moments per numeric feature and the category vocabularies; pass 2 scores
+    each chunk into ``ScoreHistogram`` sketches for AUROC, KS and fairness.
+    Memory is O(chunk + n_bins).
+
+    Examples
+    --------
+    >>> model, report = train_scorecard_streaming(csv_chunks('data/transactions_small.csv', 200))  # doctest: +SKIP
+    """
+    feat = None
+    numeric: Dict[str, bool] = {}
+    moments: Dict[str, RunningMoments] = {}
+    categories: Dict[str, set] = {}
+    for chunk in chunks():
+        if feat is None:
+            feat = [f for f in CANDIDATE_FEATURES if f in chunk.columns][:6]
+            numeric = {f: chunk[f].dtype.kind in "biufc" for f in feat}
+        y = chunk[label].to_numpy(dtype=float)
+        for f in feat:
+            if numeric[f]:
+                moments.setdefault(f, RunningMoments()).update(np.nan_to_num(chunk[f].to_numpy(dtype=float)), y)
+            else:
+                categories.setdefault(f, set()).update(chunk[f].dropna().unique())
+    if feat is None:
+        raise ValueError("chunks() yielded no data")
+
+    # Coefs: same correlation-sign proxy as train_scorecard
+    coefs = {f: float(np.sign(moments[f].corr()) * 0.3) if numeric[f] else 0.1 for f in feat}
+    vocab = {f: pd.Index(sorted(categories.get(f, ()))) for f in feat if not numeric[f]}
+    model = ScorecardModel(features=feat, bins={}, coefs=coefs, intercept=-2.0, vocab=vocab)
+
+    protected = list(protected)
+    overall = ScoreHistogram(n_bins)
+    by_group: Dict[str, Dict[object, ScoreHistogram]] = {}
+    for chunk in chunks():
+        p = model.predict_proba(chunk)
+        y = chunk[label].to_numpy()
+        overall.update(y, p)
+        for col in protected:
+            if col in chunk.columns:
+                hists = by_group.setdefault(col, {})
+                for g, idx in chunk.groupby(col).indices.items():
+                    hists.setdefault(g, ScoreHistogram(n_bins)).update(y[idx], p[idx])
 
-    # Fairness check across income_band if present
     fairness = {}
-    if "income_band" in df.columns:
-        by_band = []
-        for band, grp in df.groupby("income_band"):
-            if len(grp) >= 10:
-                auc_b = auroc(grp[label].to_numpy(), model.predict_proba(grp))
-                by_band.append((band, float(auc_b), float(grp[label].mean())))
-        fairness["income_band"] = [{"band":b, "auroc":a, "positive_rate":pr} for b,a,pr in by_band]
-
-    report = {
-        "model": {
-            "features": feat,
-            "coefs": coefs,
-            "intercept": intercept
-        },
-        "metrics": {
-            "auroc": float(auc),
-            "ks": float(ks)
-        },
-        "explanation": {
-            "top_drivers": drivers,
-            "notes": "Simple monotonic transforms; coefficients scaled by correlation sign."
-        },
-        "fairness": fairness
-    }
+    for col, hists in by_group.items():
+        groups = sorted(hists)
+        fairness[col] = _fairness_rows(
+            groups, [hists[g].auroc() for g in groups], [hists[g].n for g in groups],
+            [hists[g].n_pos / hists[g].n for g in groups])
+    report = _scorecard_report(model, overall.auroc(), overall.ks(), fairness,
+                               f"Streaming fit; AUROC/KS from {n_bins}-bin score histograms.")
+    report["n_rows"] = overall.n
     return model, report
+
+class ModelRegistry:
+    """In-memory, versioned store of trained scorecards.
+
+    Training happens once (at startup or on explicit request); scoring then
+    only needs a dictionary lookup plus ``predict_proba``.
+
+    Examples
+    --------
+    >>> reg = ModelRegistry()
+    >>> v = reg.train(df_tx)            # doctest: +SKIP
+    >>> model, report = reg.get(v)      # doctest: +SKIP
+    """
+    def __init__(self):
+        self._models: Dict[int, Tuple[ScorecardModel, Dict]] = {}
+        self._latest: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def train(self, df: pd.DataFrame, label: str = "label_fraud") -> int:
+        """Train a new scorecard on ``df`` and register it as the latest version."""
+        model, report = train_scorecard(df, label=label)
+        with self._lock:
+            version = (self._latest or 0) + 1
+            report = {**report, "version": version}
+            self._models[version] = (model, report)
+            self._latest = version
+        return version
+
+    def get(self, version: Optional[int] = None) -> Tuple[ScorecardModel, Dict]:
+        """Return ``(model, report)`` for ``version`` (latest when None).
+
+        Raises KeyError if the version is unknown or nothing was trained yet.
+        """
+        with self._lock:
+            key = self._latest if version is None else version
+            if key is None or key not in self._models:
+                raise KeyError(version)
+            return self._models[key]
+
+    @property
+    def latest(self) -> Optional[int]:
+        return self._latest
+
+    def versions(self) -> list:
+        with self._lock:
+            return sorted(self._models)
@@ -0,0 +1,181 @@
+"""
+Receptor de status por push (SSE) do agente local de ping
+Uma thread do processo do dashboard mantém aberta a conexão com ``/events``
+do ``ping_service.py`` e aplica cada mudança no store compartilhado das
+impressoras assim que ela chega, sem polling.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from .printer_poller import PrinterStatusStore
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 5
+# sem nenhum byte (nem keep-alive) por este tempo, a conexão é refeita
+READ_TIMEOUT = 45
+MAX_BACKOFF = 30
+
+def parse_sse(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Converte linhas de um stream SSE em pares ``(evento, dados)``"""
+    event, data = "message", []
+    for line in lines:
+        if line == "":
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+
+def _stream_lines(response: requests.Response, stop: threading.Event) -> Iterator[str]:
+    """Linhas do corpo assim que chegam (``iter_lines`` espera encher 512 bytes)"""
+    response.encoding = "utf-8"
+    buffer = ""
+    for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+        if stop.is_set():
+            return
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+class StatusStreamReceiver:
+    """Assina ``/events`` do agente e grava cada status no ``store``.
+
+    Ao conectar, registra os IPs em ``/watch`` (o agente passa a monitorá-los)
+    e recebe um snapshot; depois chegam só as mudanças online/offline. Queda
+    de conexão é refeita com backoff exponencial. O histórico não é gravado
+    aqui (eventos não são amostras no tempo): o ``PrinterPoller`` com
+    ``scan=False`` amostra o store periodicamente.
+    """
+
+    def __init__(self, agent_url: str, store: PrinterStatusStore, ips: Iterable[str] = (),
+                 on_event: Optional[Callable[[Dict[str, Dict]], None]] = None):
+        self.agent_url = agent_url.rstrip("/")
+        self.store = store
+        self.on_event = on_event
+        self.ips: List[str] = list(dict.fromkeys(ips))
+        self.connected = threading.Event()
+        self.events = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _apply(self, results: Dict[str, Dict]) -> None:
+        if not results:
+            return
+        self.store.update(results)
+        self.events += 1
+        if self.on_event is not None:
+            self.on_event(results)
+
+    def watch(self, ips: Iterable[str]) -> None:
+        """Pede ao agente para monitorar mais IPs"""
+        new = [ip for ip in ips if ip and ip != "N/A" and ip not in self.ips]
+        if new:
+            self.ips.extend(new)
+            if self.connected.is_set():
+                self._post_watch(new)
+
+    def _post_watch(self, ips: List[str]) -> None:
+        try:
+            requests.post(f"{self.agent_url}/watch", json={"ips": ips}, timeout=CONNECT_TIMEOUT)
+        except requests.RequestException as e:
+            logger.warning("Falha ao registrar IPs no agente: %s", e)
+
+    def refresh(self, timeout: float = 10) -> bool:
+        """Ping imediato de todos os IPs via ``/ping/batch`` do agente"""
+        try:
+            response = requests.post(f"{self.agent_url}/ping/batch", json={"ips": self.ips}, timeout=timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning("Falha no ping em lote do agente: %s", e)
+            return False
+        self._apply(response.json().get("results", {}))
+        return True
+
+    def ping(self, ip: str, timeout: float = 10) -> Optional[Dict]:
+        """Ping imediato de um IP pelo agente (``/ping/<ip>``); ``None`` se o agente falhar"""
+        try:
+            response = requests.get(f"{self.agent_url}/ping/{ip}", timeout=timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning("Falha no ping de %s pelo agente: %s", ip, e)
+            return None
+        result = response.json()
+        self._apply({ip: result})
+        return result
+
+    def _listen(self) -> None:
+        with requests.get(f"{self.agent_url}/events", stream=True,
+                          timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                          headers={"Accept": "text/event-stream"}) as response:
+            response.raise_for_status()
+            self.connected.set()
+            if self.ips:
+                self._post_watch(self.ips)
+            for event, data in parse_sse(_stream_lines(response, self._stop)):
+                payload = json.loads(data)
+                if event == "snapshot":
+                    self._apply(payload)
+                elif event == "status":
+                    self._apply({payload["ip"]: payload})
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self._listen()
+            except Exception as e:
+                logger.info("Stream de status desconectado: %s", e)
+            finally:
+                self.connected.clear()
+            if time.monotonic() - started > MAX_BACKOFF:
+                backoff = 1.0
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "StatusStreamReceiver":
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="status-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        # a leitura do stream para no próximo evento ou keep-alive do agente
+        if self._thread is not None:
+            self._thread.join(timeout=CONNECT_TIMEOUT)
+        self._thread = None
+
+_receiver: Optional[StatusStreamReceiver] = None
+_receiver_lock = threading.Lock()
+
+def get_receiver(agent_url: str, store: PrinterStatusStore, ips: Iterable[str] = ()) -> StatusStreamReceiver:
+    """Receptor único do processo, iniciado na primeira chamada"""
+    global _receiver
+    with _receiver_lock:
+        if _receiver is None:
+            _receiver = StatusStreamReceiver(agent_url, store, ips).start()
+        else:
+            _receiver.watch(ips)
+        return _receiver
@@ -0,0 +1,151 @@
+"""
+Store de sincronização em memória com gravação em segundo plano
+Os dados de ``sync_data.json`` ficam num único dicionário por processo,
+protegido por lock; as alterações marcam o store como sujo e uma thread grava
+o JSON compacto em lote (arquivo temporário + rename), no máximo uma vez por
+``flush_interval``.
+"""
+from __future__ import annotations
+
+import atexit
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 1.0
+
+class SyncStore:
+    """Dicionário compartilhado do processo, persistido por write-behind.
+
+    Leituras e escritas são O(1) em memória. Outro processo gravando o mesmo
+    arquivo (ex.: a página da API e o dashboard) é detectado pelo mtime e
+    recarregado enquanto não houver alterações locais pendentes; o rename
+    atômico garante que ninguém leia um arquivo pela metade.
+    """
+
+    def __init__(self, path: str | Path, default: Callable[[], Dict], flush_interval: float = FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.default = default
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        # serializa gravações para um payload antigo nunca sobrescrever um mais novo
+        self._write_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._mtime: Optional[float] = None
+        self._writer: Optional[threading.Thread] = None
+        self.writes = 0
+        self._data = self._load()
+
+    def _load(self) -> Dict:
+        try:
+            self._mtime = os.stat(self.path).st_mtime
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            self._mtime = None
+            return self.default()
+
+    def _maybe_reload(self) -> None:
+        if self._dirty.is_set():
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self._data = self._load()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Cópia rasa de ``data[key]``"""
+        with self._lock:
+            self._maybe_reload()
+            value = self._data.get(key, default)
+            return dict(value) if isinstance(value, dict) else value
+
+    def snapshot(self) -> Dict:
+        """Cópia completa dos dados (para exibição/exportação)"""
+        with self._lock:
+            self._maybe_reload()
+            return copy.deepcopy(self._data)
+
+    def update(self, mutate: Callable[[Dict], None]) -> None:
+        """Aplica ``mutate(data)`` sob o lock e agenda a gravação"""
+        with self._lock:
+            self._maybe_reload()
+            mutate(self._data)
+            self._mark_dirty()
+
+    def replace(self, data: Dict) -> None:
+        with self._lock:
+            self._data = data
+            self._mark_dirty()
+
+    def reset(self) -> None:
+        """Volta ao estado inicial e apaga o arquivo"""
+        # mesma ordem de ``flush``: uma gravação em andamento termina antes do
+        # arquivo ser apagado, e não o recria com os dados antigos
+        with self._write_lock, self._lock:
+            self._data = self.default()
+            self._dirty.clear()
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self._mtime = None
+
+    def _mark_dirty(self) -> None:
+        self._dirty.set()
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="sync-store-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            self._dirty.wait()
+            # juntar as alterações que chegarem nesta janela numa única gravação
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Falha ao gravar %s", self.path)
+
+    def flush(self) -> bool:
+        """Grava agora se houver alterações pendentes; retorna se gravou"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty.is_set():
+                    return False
+                payload = json.dumps(self._data, ensure_ascii=False, separators=(",", ":"))
+                self._dirty.clear()
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            try:
+                tmp.write_text(payload, encoding="utf-8")
+                os.replace(tmp, self.path)
+            except OSError:
+                tmp.unlink(missing_ok=True)
+                self._dirty.set()
+                raise
+            with self._lock:
+                self._mtime = os.stat(self.path).st_mtime
+                self.writes += 1
+            return True
+
+_stores: Dict[str, SyncStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(path: str | Path, default: Callable[[], Dict]) -> SyncStore:
+    """Store único por arquivo neste processo (gravado também na saída)"""
+    key = str(Path(path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SyncStore(path, default)
+            atexit.register(store.flush)
+        return store
@@ -0,0 +1,75 @@
+"""Benchmark the Aho-Corasick RuleMatcher against the nested substring loop.
+
+Usage
+-----
+    python benchmarks/bench_categorize.py
+    python benchmarks/bench_categorize.py --rules 10000 --merchants 20000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.categorize import RuleMatcher  # noqa: E402
+
+def legacy_match(rules, text):
+    for cat, subs in rules.items():
+        for s in subs:
+            if s in text:
+                return cat
+    return None
+
+def make_rules(n_rules, n_categories, rnd):
+    rules = {f"cat_{i:03d}": [] for i in range(n_categories)}
+    cats = list(rules)
+    for _ in range(n_rules):
+        word = "".join(rnd.choice(string.ascii_uppercase) for _ in range(rnd.randint(5, 10)))
+        rules[rnd.choice(cats)].append(word)
+    return rules
+
+def make_merchants(rules, n, rnd):
+    patterns = [s for subs in rules.values() for s in subs]
+    out = []
+    for _ in range(n):
+        noise = "".join(rnd.choice(string.ascii_uppercase + " *") for _ in range(rnd.randint(8, 24)))
+        # about half the merchants contain a known pattern
+        out.append(noise + " " + rnd.choice(patterns) if rnd.random() < 0.5 else noise)
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rules", type=int, default=10_000)
+    ap.add_argument("--categories", type=int, default=50)
+    ap.add_argument("--merchants", type=int, default=5_000)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(0)
+    rules = make_rules(args.rules, args.categories, rnd)
+    merchants = make_merchants(rules, args.merchants, rnd)
+
+    t0 = time.perf_counter()
+    matcher = RuleMatcher(rules)
+    build_t = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = [matcher.match(m) for m in merchants]
+    new_t = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    old = [legacy_match(rules, m) for m in merchants]
+    old_t = time.perf_counter() - t0
+
+    assert new == old, "RuleMatcher disagrees with the nested loop"
+    print(f"rules={args.rules} merchants={args.merchants}")
+    print(f"  build automaton : {build_t:.3f}s")
+    print(f"  nested loop     : {old_t:.3f}s ({args.merchants / old_t:,.0f} merchants/s)")
+    print(f"  aho-corasick    : {new_t:.3f}s ({args.merchants / new_t:,.0f} merchants/s)")
+    print(f"  speedup         : {old_t / new_t:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark vectorized AUROC / KS in app.risk against the previous loop versions.
+
+Usage
+-----
+    python benchmarks/bench_risk.py
+    python benchmarks/bench_risk.py --sizes 10000 1000000 --legacy-max 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.risk import auroc, ks_statistic  # noqa: E402
+
+def legacy_auroc(y_true, y_score):
+    order = np.argsort(y_score)
+    y = np.array(y_true)[order]
+    n_pos = y.sum()
+    n_neg = len(y) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return 0.5
+    cum_neg = 0
+    rank_sum = 0.0
+    for i in range(len(y)):
+        if y[i] == 1:
+            rank_sum += cum_neg
+        else:
+            cum_neg += 1
+    return rank_sum / (n_pos * n_neg)
+
+def legacy_ks(y_true, p):
+    pos = np.sort(p[y_true == 1])
+    neg = np.sort(p[y_true == 0])
+    def cdf(x, arr):
+        return (arr <= x).mean() if len(arr) > 0 else 0.5
+    grid = np.linspace(0, 1, 101)
+    return float(max(abs(cdf(g, pos) - cdf(g, neg)) for g in grid))
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    ap.add_argument("--legacy-max", type=int, default=10_000_000,
+                    help="skip the loop implementations above this many rows")
+    args = ap.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>12} {'metric':>6} {'legacy_s':>10} {'vector_s':>10} {'speedup':>8} {'legacy':>8} {'vector':>8}")
+    for n in args.sizes:
+        y = (rng.random(n) < 0.05).astype(int)
+        # rounded scores so ties are exercised
+        p = np.round(rng.random(n) * 0.7 + 0.3 * y, 3)
+        for name, new_fn, old_fn in (("auroc", auroc, legacy_auroc), ("ks", ks_statistic, legacy_ks)):
+            new_val, new_t = timed(new_fn, y, p)
+            if n <= args.legacy_max:
+                old_val, old_t = timed(old_fn, y, p)
+                print(f"{n:>12} {name:>6} {old_t:>10.3f} {new_t:>10.3f} {old_t / new_t:>7.1f}x {old_val:>8.4f} {new_val:>8.4f}")
+            else:
+                print(f"{n:>12} {name:>6} {'skipped':>10} {new_t:>10.3f} {'-':>8} {'-':>8} {new_val:>8.4f}")
+
+if __name__ == "__main__":
+    main()
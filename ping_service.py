@@ -8,18 +8,26 @@ import subprocess
 import platform
 import time
 import json
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import threading
 
 app = Flask(__name__)
 CORS(app)  # Permite acesso do Streamlit Cloud
 
-# Cache de resultados
-ping_cache = {}
-cache_timestamp = {}
 CACHE_DURATION = 30  # segundos
+CACHE_MAX_SIZE = 4096  # IPs guardados no máximo
+# Pings simultâneos: um lote de até MAX_WORKERS IPs leva ~1 timeout de ping
+MAX_WORKERS = int(os.environ.get("PING_WORKERS", "256"))
+start_time = time.time()
+WATCH_INTERVAL = 15  # segundos entre varreduras dos IPs monitorados (/watch)
+HEARTBEAT_INTERVAL = 15  # comentário SSE para manter a conexão aberta
+SUBSCRIBER_QUEUE_SIZE = 1000
 
 def ping_ip_real(ip_address):
     """Faz ping real no IP - só roda localmente"""
@@ -46,30 +54,197 @@ def ping_ip_real(ip_address):
             "error": str(e)
         }
 
-def is_cache_valid(ip):
-    """Verifica se o cache ainda é válido"""
-    if ip not in cache_timestamp:
-        return False
+class PingCache:
+    """Cache de resultados com TTL e limite de tamanho, seguro entre threads"""
+    
+    def __init__(self, ttl=CACHE_DURATION, max_size=CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # ip -> (timestamp, resultado), do mais antigo ao mais novo
+    
+    def get(self, ip):
+        with self._lock:
+            entry = self._data.get(ip)
+            if entry is None:
+                return None
+            if time.time() - entry[0] >= self.ttl:
+                del self._data[ip]
+                return None
+            return entry[1]
+    
+    def put(self, ip, result):
+        with self._lock:
+            self._data[ip] = (time.time(), result)
+            self._data.move_to_end(ip)
+            # Remover expirados do início e, se ainda cheio, os mais antigos
+            now = time.time()
+            while self._data:
+                oldest_ip, (ts, _) = next(iter(self._data.items()))
+                if len(self._data) <= self.max_size and now - ts < self.ttl:
+                    break
+                del self._data[oldest_ip]
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
     
-    elapsed = time.time() - cache_timestamp[ip]
-    return elapsed < CACHE_DURATION
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
 
-@app.route('/ping/<ip>')
-def ping_single(ip):
-    """Ping em um IP específico"""
+# Cache de resultados
+ping_cache = PingCache()
+
+# Pool de pings e pings em andamento (single-flight: um único ping por IP,
+# compartilhado entre todas as requisições que pedirem o mesmo IP ao mesmo tempo)
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ping")
+_inflight = {}
+# RLock: o callback roda na própria thread se o ping terminar antes de ser registrado
+_inflight_lock = threading.RLock()
+
+class EventBroker:
+    """Distribui mudanças de status para os assinantes de /events"""
+    
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._last_online = {}  # ip -> último estado publicado
+        self._last_result = {}
+        self._event_id = 0
+    
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.append(q)
+            snapshot = dict(self._last_result)
+        return q, snapshot
+    
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+    
+    def publish_result(self, result):
+        """Publica o resultado só se o estado online/offline do IP mudou"""
+        ip = result["ip"]
+        with self._lock:
+            self._last_result[ip] = result
+            if self._last_online.get(ip) == result["online"]:
+                return False
+            self._last_online[ip] = result["online"]
+            self._event_id += 1
+            event = (self._event_id, result)
+            for q in self._subscribers:
+                try:
+                    q.put_nowait(event)
+                except queue.Full:
+                    # assinante lento: descartar o evento mais antigo
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+                    q.put_nowait(event)
+        return True
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._subscribers)
+
+broker = EventBroker()
+
+def _finish_ping(ip, future):
+    try:
+        result = future.result()
+        ping_cache.put(ip, result)
+        broker.publish_result(result)
+    finally:
+        with _inflight_lock:
+            if _inflight.get(ip) is future:
+                del _inflight[ip]
+
+def submit_ping(ip, use_cache=True):
+    """Future com o resultado do ping: do cache, de um ping já em andamento ou de um novo"""
+    cached = ping_cache.get(ip) if use_cache else None
+    if cached is not None:
+        future = Future()
+        future.set_result(cached)
+        return future
+    with _inflight_lock:
+        future = _inflight.get(ip)
+        if future is None:
+            future = executor.submit(ping_ip_real, ip)
+            _inflight[ip] = future
+            future.add_done_callback(lambda f, ip=ip: _finish_ping(ip, f))
+        return future
+
+# IPs monitorados continuamente pelo agente (mudanças saem em /events)
+watched_ips = set()
+_watch_lock = threading.Lock()
+_watch_thread = None
+
+def _watch_loop():
+    while True:
+        with _watch_lock:
+            ips = list(watched_ips)
+        for ip in ips:
+            submit_ping(ip, use_cache=False)
+        time.sleep(WATCH_INTERVAL)
+
+def watch(ips):
+    """Inclui IPs na varredura periódica e inicia a thread de monitoramento"""
+    global _watch_thread
+    with _watch_lock:
+        watched_ips.update(ip for ip in ips if ip and ip != 'N/A')
+        if _watch_thread is None:
+            _watch_thread = threading.Thread(target=_watch_loop, name="watch", daemon=True)
+            _watch_thread.start()
+    for ip in ips:
+        if ip and ip != 'N/A':
+            submit_ping(ip)
+
+def _sse(event, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, ensure_ascii=False)}", "", ""]
+    return "\n".join(lines)
+
+@app.route('/events')
+def events():
+    """Stream SSE: um snapshot ao conectar e depois cada mudança de status"""
+    q, snapshot = broker.subscribe()
     
-    # Verificar cache
-    if is_cache_valid(ip):
-        return jsonify(ping_cache[ip])
+    def stream():
+        try:
+            yield _sse("snapshot", snapshot)
+            while True:
+                try:
+                    event_id, result = q.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse("status", result, event_id)
+        finally:
+            broker.unsubscribe(q)
     
-    # Fazer ping real
-    result = ping_ip_real(ip)
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/watch', methods=['POST'])
+def watch_ips():
+    """Registra IPs para monitoramento contínuo"""
+    data = request.get_json()
     
-    # Atualizar cache
-    ping_cache[ip] = result
-    cache_timestamp[ip] = time.time()
+    if not data or 'ips' not in data:
+        return jsonify({"error": "Lista de IPs necessária"}), 400
     
-    return jsonify(result)
+    watch(data['ips'])
+    return jsonify({"watching": len(watched_ips), "interval": WATCH_INTERVAL})
+
+@app.route('/ping/<ip>')
+def ping_single(ip):
+    """Ping em um IP específico"""
+    return jsonify(submit_ping(ip).result())
 
 @app.route('/ping/batch', methods=['POST'])
 def ping_batch():
@@ -79,22 +254,9 @@ def ping_batch():
     if not data or 'ips' not in data:
         return jsonify({"error": "Lista de IPs necessária"}), 400
     
-    ips = data['ips']
-    results = {}
-    
-    for ip in ips:
-        # Verificar cache primeiro
-        if is_cache_valid(ip):
-            results[ip] = ping_cache[ip]
-        else:
-            # Fazer ping real
-            result = ping_ip_real(ip)
-            
-            # Atualizar cache
-            ping_cache[ip] = result
-            cache_timestamp[ip] = time.time()
-            
-            results[ip] = result
+    # Disparar todos os pings de uma vez (cache e pings em andamento são reaproveitados)
+    futures = {ip: submit_ping(ip) for ip in data['ips']}
+    results = {ip: future.result() for ip, future in futures.items()}
     
     return jsonify({
         "results": results,
@@ -112,15 +274,18 @@ def status():
         "cache_size": len(ping_cache),
         "platform": platform.system(),
         "uptime": time.time() - start_time,
-        "cache_duration": CACHE_DURATION
+        "cache_duration": CACHE_DURATION,
+        "cache_max_size": CACHE_MAX_SIZE,
+        "in_flight": len(_inflight),
+        "max_workers": MAX_WORKERS,
+        "watching": len(watched_ips),
+        "subscribers": len(broker)
     })
 
 @app.route('/clear-cache')
 def clear_cache():
     """Limpa o cache"""
-    global ping_cache, cache_timestamp
     ping_cache.clear()
-    cache_timestamp.clear()
     
     return jsonify({
         "message": "Cache limpo com sucesso",
@@ -128,13 +293,12 @@ def clear_cache():
     })
 
 if __name__ == '__main__':
-    start_time = time.time()
-    
     print("🏢 Iniciando Serviço Local de Ping para Impressoras Nubank")
     print("=" * 60)
     print("📍 Serviço: http://localhost:5000")
     print("📊 Status: http://localhost:5000/status")
     print("🔄 Limpar Cache: http://localhost:5000/clear-cache")
+    print("📡 Eventos (SSE): http://localhost:5000/events")
     print("=" * 60)
     print("💡 Mantenha este serviço rodando para ping real das impressoras")
     print("🌐 O Streamlit Cloud irá se conectar neste serviço")
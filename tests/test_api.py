@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+from app import api
+from app.api import app
+
+@pytest.fixture(scope="module")
+def client():
+    # entering the client runs the lifespan, which loads data in the background
+    with TestClient(app) as c:
+        assert api.state.ready.wait(30)
+        yield c
+
+def test_score_uses_cached_model(client):
+    r = client.post("/score", json={"amount": 120.0})
+    assert r.status_code == 200
+    body = r.json()
+    assert 0.0 <= body["p_default"] <= 1.0
+    assert body["model_version"] in client.get("/models").json()["versions"]
+
+def test_retrain_and_report(client):
+    v = client.post("/models/retrain").json()["version"]
+    assert client.get(f"/models/{v}/report").json()["version"] == v
+    assert client.get("/models/9999/report").status_code == 404
+
+def test_score_batch_columnar_and_ndjson_agree(client):
+    cols = {"amount": [10.0, 250.0], "channel": ["card", "pix"]}
+    r = client.post("/score/batch", json=cols)
+    assert r.status_code == 200
+    batch = [json.loads(line)["p_default"] for line in r.text.splitlines()]
+    nd = "\n".join(json.dumps({"amount": a, "channel": ch}) for a, ch in zip(cols["amount"], cols["channel"]))
+    r2 = client.post("/score/batch", content=nd, headers={"content-type": "application/x-ndjson"})
+    assert [json.loads(line)["p_default"] for line in r2.text.splitlines()] == batch
+    assert client.post("/score/batch", json={"mcc": [5411]}).status_code == 422
+    assert client.post("/score/batch", json={"amount": ["a", "b"]}).status_code == 422
+    assert client.post("/score/batch", json={"amount": [1.0, None]}).status_code == 422
+    assert client.post("/score/batch", json={"amount": [1.0], "installments": [1.5]}).status_code == 422
+    assert client.post("/score/batch", json={"amount": ["12.5"], "mcc": ["5411"]}).status_code == 200
+    assert client.post("/score/batch", content=b"a,b", headers={"content-type": "text/csv"}).status_code == 415
+
+def test_categorize_batch(client):
+    r = client.post("/categorize/batch", json={"merchants": ["UBER *TRIP", "SUSHI RIO"], "amounts": [42.0, 25.0]})
+    assert r.json() == {"categories": ["transport", "dining"]}
+    assert client.post("/categorize/batch", json={"merchants": ["X"], "amounts": []}).status_code == 422
+
+def test_simulate_sweep_streams_each_grid_point(client):
+    body = {"policy": {"type": "limit_uplift", "segment": "B"}, "grid": {"pct": [0.05, 0.1, 0.2]}, "n_boot": 50}
+    r = client.post("/simulate/sweep", json=body)
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["index"] for row in rows] == [0, 1, 2]
+    assert [row["policy"]["pct"] for row in rows] == [0.05, 0.1, 0.2]
+    assert rows[0]["delta_revenue"] < rows[2]["delta_revenue"]
+    assert client.post("/simulate/sweep", json={**body, "grid": {"bogus": [1]}}).status_code == 422
+    assert client.post("/simulate/sweep", json={**body, "grid": {"pct": ["abc"]}}).status_code == 422
+    assert client.post("/simulate/sweep", json={**body, "n_boot": 10**7}).status_code == 422
+    # 2048**6 == 2**66: overflows int64 (np.prod gives 0) but must still hit the cap
+    huge = {f: list(range(2048)) for f in ("type", "segment", "pct", "old", "new", "category")}
+    assert client.post("/simulate/sweep", json={**body, "grid": huge}).status_code == 422
+
+def test_health_and_readiness(client):
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").json()["status"] == "ready"
+
+def test_data_endpoints_wait_for_readiness(monkeypatch):
+    monkeypatch.setattr(api, "state", api.DataState())
+    c = TestClient(app)  # no lifespan: nothing loads
+    assert c.post("/categorize", json={"merchant": "UBER *TRIP", "amount": 10.0}).status_code == 200
+    assert c.get("/readyz").status_code == 503
+    r = c.post("/score", json={"amount": 10.0})
+    assert r.status_code == 503 and r.headers["retry-after"] == "5"
+
+def test_failed_load_is_retried(monkeypatch):
+    calls = []
+
+    def flaky_load(data_dir):
+        calls.append(data_dir)
+        if len(calls) == 1:
+            raise OSError("stale NFS handle")
+        return real_load(data_dir)
+
+    real_load = api.load_data
+    monkeypatch.setattr(api, "load_data", flaky_load)
+    monkeypatch.setattr(api, "state", api.DataState())
+    monkeypatch.setattr(api, "LOAD_RETRY_DELAY", 0.05)
+    with TestClient(app) as c:
+        assert api.state.ready.wait(30)
+        assert len(calls) == 2 and api.state.error is None
+        assert c.get("/readyz").json()["status"] == "ready"
@@ -4,3 +4,49 @@ def test_rules_win_over_model():
     c = Categorizer("rules.yaml", "model.pkl")
     assert c.predict("UBER *TRIP", 42.0) == "transport"
     assert c.predict("SUSHI RIO", 25.0) == "dining"
+
+def test_matcher_keeps_first_category_priority():
+    from app.categorize import RuleMatcher
+    rules = {"transport": ["UBER"], "misc": ["SHOP", "UB"], "books": ["BCD"], "dining": ["ABCX"]}
+    m = RuleMatcher(rules)
+    assert m.match("UBER SHOP") == "transport"
+    assert m.match("XUB") == "misc"
+    assert m.match("ABCD") == "books"  # overlapping patterns via failure links
+    assert m.match("NOTHING") is None
+
+def test_predict_many_matches_predict():
+    import pandas as pd
+    c = Categorizer("rules.yaml", None)
+    df = pd.read_csv("data/transactions_small.csv")
+    bulk = c.predict_many(df["merchant"], df["amount"])
+    assert bulk.tolist() == [c.predict(m, a) for m, a in zip(df["merchant"], df["amount"])]
+    assert c.predict_many(["TV STORE", None], [900.0, 1.0]).tolist() == ["electronics", "misc"]
+
+def test_predict_cache_counters_and_reload():
+    c = Categorizer("rules.yaml", None, cache_size=2)
+    assert c.predict("UBER *TRIP", 42.0) == "transport"
+    assert c.predict("uber *trip", 10.0) == "transport"  # same normalized key
+    assert c.predict("TV STORE", 900.0) == "electronics"
+    assert c.predict("TV STORE", 10.0) == "misc"  # different amount bucket
+    stats = c.cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    c.reload()
+    assert c.cache.stats()["size"] == 0
+
+def test_reload_swaps_rules_and_keeps_old_on_error(tmp_path):
+    import os
+    import pytest
+    rules = tmp_path / "rules.yaml"
+    rules.write_text("transport:\n  - UBER\n")
+    c = Categorizer(rules, None)
+    assert c.predict("UBER *TRIP", 10.0) == "transport"
+    rules.write_text("rides:\n  - UBER\n")
+    os.utime(rules, (0, 12345))
+    assert c.reload_if_changed()
+    assert c.rules_version == 2
+    assert c.predict("UBER *TRIP", 10.0) == "rides"
+    rules.write_text("rides: [unclosed\n")
+    with pytest.raises(Exception):
+        c.reload()
+    assert c.rules_version == 2
+    assert c.predict("UBER *TRIP", 10.0) == "rides"
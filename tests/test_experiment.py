@@ -0,0 +1,43 @@
+import numpy as np
+from app.experiment import bootstrap_sums, simulate
+from app.ingest import load_data
+
+def test_bootstrap_sums_shape_and_spread():
+    vals = np.arange(100, dtype=float)
+    sums = bootstrap_sums(vals, n_boot=500, seed=1)
+    assert sums.shape == (500,)
+    assert abs(sums.mean() - vals.sum()) < 0.05 * vals.sum()
+    assert np.array_equal(sums, bootstrap_sums(vals, n_boot=500, seed=1))
+    assert bootstrap_sums(vals, n_boot=0).shape == (0,)
+
+def test_simulate_ci_brackets_point_estimate():
+    df_tx, df_cust = load_data("data")
+    out = simulate({"type": "limit_uplift", "segment": "B", "pct": 0.1}, df_tx, df_cust, n_boot=100)
+    lo, hi = out["ci_90"]
+    assert lo <= out["delta_revenue"] <= hi
+
+def test_context_matches_direct_frame_computation():
+    from app.experiment import SimulationContext
+    df_tx, df_cust = load_data("data")
+    ctx = SimulationContext.from_frames(df_tx, df_cust)
+    df = df_tx.copy()
+    mask = df["category_hint"] == "groceries"
+    df.loc[mask, "amount"] = df.loc[mask, "amount"] * 1.1
+    expected = (df["amount"] * df["fee_rate"] * (1 - df["is_refund"])).sum()
+    got = ctx.revenue_under({"type": "rewards_tweak", "category": "groceries", "old": 0.01, "new": 0.02})
+    assert abs(got - expected) < 1e-6
+    rng = np.random.default_rng(7)
+    scores = rng.random(len(df_tx)) * (0.6 + 0.8 * df_tx["label_fraud"])
+    keep = (scores < 0.6) & (df_tx["label_fraud"] == 0)
+    expected = (df_tx.loc[keep, "amount"] * df_tx.loc[keep, "fee_rate"]).sum()
+    assert abs(ctx.revenue_under({"type": "fraud_threshold", "old": 0.7, "new": 0.6}) - expected) < 1e-6
+
+def test_sweep_matches_single_simulations():
+    from app.experiment import expand_grid, simulate_sweep
+    df_tx, df_cust = load_data("data")
+    policies = expand_grid({"type": "rewards_tweak", "category": "groceries", "old": 0.01}, {"new": [0.02, 0.03]})
+    swept = list(simulate_sweep(policies, df_tx, df_cust, n_boot=50))
+    for row, policy in zip(swept, policies):
+        single = simulate(policy, df_tx, df_cust, n_boot=50)
+        assert row["delta_revenue"] == single["delta_revenue"]
+        assert row["ci_90"] == single["ci_90"]
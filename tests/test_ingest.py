@@ -0,0 +1,35 @@
+import os
+import shutil
+
+import pytest
+from app.ingest import basic_eda, load_data
+
+def test_columnar_cache_is_typed_and_refreshed(tmp_path):
+    pytest.importorskip("pyarrow")
+    for name in ("transactions_small.csv", "customers_small.csv"):
+        shutil.copy(os.path.join("data", name), tmp_path / name)
+    df_csv, _ = load_data(tmp_path, fmt="csv")
+    df_tx, df_cust = load_data(tmp_path)
+    cache = tmp_path / "transactions_small.parquet"
+    assert cache.exists()
+    assert str(df_tx["channel"].dtype) == "category"
+    assert df_tx["mcc"].dtype == "int32"
+    assert len(df_tx) == len(df_csv) and len(df_cust) > 0
+    # a newer CSV invalidates the cache
+    csv = tmp_path / "transactions_small.csv"
+    csv.write_text(csv.read_text().rsplit("\n", 2)[0] + "\n")
+    os.utime(csv, (cache.stat().st_mtime + 10, cache.stat().st_mtime + 10))
+    assert len(load_data(tmp_path)[0]) == len(df_csv) - 1
+    assert set(basic_eda(df_tx).columns) == {"channel", "category_hint", "n", "avg_amt", "fraud_rate"}
+
+def test_blank_integer_cell_keeps_the_column_float(tmp_path):
+    for name in ("transactions_small.csv", "customers_small.csv"):
+        shutil.copy(os.path.join("data", name), tmp_path / name)
+    csv = tmp_path / "transactions_small.csv"
+    header, first, *rest = csv.read_text().splitlines()
+    cells = first.split(",")
+    cells[header.split(",").index("mcc")] = ""
+    csv.write_text("\n".join([header, ",".join(cells), *rest]) + "\n")
+    df_tx, _ = load_data(tmp_path, fmt="csv")
+    assert df_tx["mcc"].dtype == "float64" and df_tx["mcc"].isna().sum() == 1
+    assert str(df_tx["channel"].dtype) == "category"
@@ -0,0 +1,131 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app.papercut import PaperCutPageCache, fetch_printer_pages
+
+PAGE = ("<table><tr><th>Printer</th><th>IP</th><th>Status</th></tr>"
+        "<tr><td>EPSON WF-C5790</td><td>172.25.61.53</td><td>online</td></tr></table>" + " " * 600).encode()
+
+def _parse(html, url):
+    return {"PC_172_25_61_53": {"ip": "172.25.61.53"}} if "172.25.61.53" in html else {}
+
+def test_only_known_pages_are_refetched_and_revalidated_by_etag():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path != "/app?service=page/PrinterList":
+                body, code = b"nope", 404
+            elif self.headers.get("If-None-Match") == '"v1"':
+                body, code = b"", 304
+            else:
+                body, code = PAGE, 200
+            self.send_response(code)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}/app"
+    urls = [f"{base}?service=page/{p}" for p in ("PrinterList", "Printers", "DeviceList", "PrinterStatus")]
+    cache = PaperCutPageCache(ttl=60)
+    parsed = []
+
+    def parse(html, url):
+        parsed.append(url)
+        return _parse(html, url)
+
+    try:
+        with requests.Session() as session:
+            printers, report = fetch_printer_pages(session, urls, parse, cache, base)
+            assert list(printers) == ["PC_172_25_61_53"] and len(hits) == 4
+            assert cache.known_good[base] == urls[:1]
+            assert [r[1] for r in report] == ["nova", "vazia", "vazia", "vazia"]
+
+            # within the TTL: no request at all
+            hits.clear()
+            assert fetch_printer_pages(session, urls, parse, cache, base)[0] == printers
+            assert hits == []
+
+            # after the TTL: only the known page, answered with 304 and not re-parsed
+            cache.ttl = 0
+            printers2, report2 = fetch_printer_pages(session, urls, parse, cache, base)
+            assert printers2 == printers and hits == ["/app?service=page/PrinterList"]
+            assert report2[0][1] == "inalterada" and parsed == urls[:1]
+    finally:
+        srv.shutdown()
+
+def test_sync_applies_only_changed_fields_and_logs_delta(tmp_path):
+    from app.papercut import PaperCutSync, apply_to_rows
+    sync = PaperCutSync(tmp_path / "snap.json")
+    first = {
+        "PC_a": {"ip": "172.25.61.53", "status": "● Online (PaperCut)", "contador": "100", "ultima_atualizacao": "10:00"},
+        "PC_b": {"ip": "172.25.61.20", "status": "● Online (PaperCut)", "contador": "50", "ultima_atualizacao": "10:00"},
+    }
+    assert sync.apply(first)["counts"] == {"added": 2, "changed": 0, "removed": 0}
+
+    second = {"PC_a": dict(first["PC_a"], contador="120", ultima_atualizacao="10:05")}
+    change = sync.apply(second)
+    assert change["changed"] == {"172.25.61.53": {"contador": "120"}}
+    assert change["removed"] == ["172.25.61.20"]
+
+    rows = [{"ip": "172.25.61.53", "serial": "X1", "contador_paginas": 0}, {"ip": "172.25.61.99"}]
+    assert apply_to_rows(rows, change, {"contador": "contador_paginas"}) == 1
+    assert rows[0]["contador_paginas"] == "120" and rows[1] == {"ip": "172.25.61.99"}
+
+    payload = sync.delta_payload(change)
+    assert payload["mode"] == "delta" and list(payload["results"]) == ["172.25.61.53"]
+    assert payload["removed"] == ["172.25.61.20"]
+
+    reloaded = PaperCutSync(tmp_path / "snap.json")
+    assert reloaded.snapshot["172.25.61.53"]["contador"] == "120" and len(reloaded.changelog) == 2
+
+def test_transient_error_on_a_known_page_keeps_its_printers(tmp_path):
+    from app.papercut import PaperCutSync
+    broken = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = self.path.rsplit("/", 1)[-1]
+            if page in broken:
+                body, code = b"Internal error", 500
+            else:
+                ip = {"Page1": "172.25.61.53", "Page2": "172.25.61.20"}[page]
+                body, code = PAGE.replace(b"172.25.61.53", ip.encode()), 200
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    def parse(html, url):
+        return {f"PC_{ip}": {"ip": ip} for ip in ("172.25.61.53", "172.25.61.20") if ip in html}
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}/app"
+    urls = [f"{base}?service=page/Page1", f"{base}?service=page/Page2"]
+    cache = PaperCutPageCache(ttl=0)
+    sync = PaperCutSync(tmp_path / "snap.json")
+    try:
+        with requests.Session() as session:
+            printers, _ = fetch_printer_pages(session, urls, parse, cache, base)
+            assert sync.apply(printers)["counts"]["added"] == 2
+
+            broken.add("Page2")  # page 2 of 2 answers 500 on the next sync
+            printers, report = fetch_printer_pages(session, urls, parse, cache, base)
+            assert report[1][1:3] == ("vazia", 1)
+            assert len(printers) == 2 and cache.known_good[base] == urls
+            assert sync.apply(printers)["removed"] == []
+    finally:
+        srv.shutdown()
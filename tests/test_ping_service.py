@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask_cors")
+import ping_service
+
+@pytest.fixture
+def slow_ping(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_ping(ip):
+        with lock:
+            calls.append(ip)
+        time.sleep(0.3)
+        return {"ip": ip, "online": ip.endswith(".1"), "timestamp": "t"}
+
+    monkeypatch.setattr(ping_service, "ping_ip_real", fake_ping)
+    ping_service.ping_cache.clear()
+    yield calls
+    ping_service.ping_cache.clear()
+
+def test_batch_fans_out_and_caches(slow_ping):
+    client = ping_service.app.test_client()
+    ips = [f"10.0.0.{i}" for i in range(1, 101)]
+    start = time.perf_counter()
+    body = client.post("/ping/batch", json={"ips": ips}).get_json()
+    assert time.perf_counter() - start < 2.0
+    assert body["total"] == 100 and body["online_count"] == 1
+    # second batch is served entirely from the cache
+    client.post("/ping/batch", json={"ips": ips})
+    assert len(slow_ping) == 100
+    assert client.get("/status").get_json()["cache_size"] == 100
+
+def test_concurrent_requests_share_in_flight_ping(slow_ping):
+    client = ping_service.app.test_client()
+    threads = [threading.Thread(target=client.get, args=("/ping/10.0.0.1",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert slow_ping == ["10.0.0.1"]
+
+def test_cache_ttl_and_size_cap():
+    cache = ping_service.PingCache(ttl=0.2, max_size=2)
+    for ip in ("a", "b", "c"):
+        cache.put(ip, {"ip": ip})
+    assert len(cache) == 2 and cache.get("a") is None
+    time.sleep(0.25)
+    assert cache.get("c") is None
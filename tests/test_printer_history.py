@@ -0,0 +1,29 @@
+from app.printer_history import PrinterHistory
+
+HOUR = 3600.0
+
+def _scan(online, black=None):
+    ink = {"black": f"{black}%", "cyan": "N/A"} if black is not None else None
+    return {"online": online, "latency": 2.0, "ink_levels": ink}
+
+def test_uptime_spans_raw_and_downsampled_rows(tmp_path):
+    h = PrinterHistory(tmp_path / "h.sqlite", raw_retention=24 * HOUR)
+    t0 = 1_700_000_000 // HOUR * HOUR
+    for i in range(48):  # one scan per hour over two days, offline every 4th
+        h.record({"10.0.0.1": _scan(i % 4 != 0), "10.0.0.2": _scan(True)}, ts=t0 + i * HOUR)
+    h.downsample(now=t0 + 48 * HOUR)
+    n_raw = h._con.execute("SELECT count(*) FROM samples").fetchone()[0]
+    assert 0 < n_raw < 96
+    assert h.uptime(t0, t0 + 48 * HOUR) == {"10.0.0.1": 75.0, "10.0.0.2": 100.0}
+    assert len(h.range(t0, t0 + 48 * HOUR, ips=["10.0.0.2"])) == 48
+
+def test_ink_forecast_restarts_after_refill(tmp_path):
+    h = PrinterHistory(tmp_path / "h.sqlite")
+    t0 = 1_700_000_000.0
+    levels = [30, 25, 20, 100, 98, 96, 94]  # cartridge swapped after the third day
+    for day, level in enumerate(levels):
+        h.record({"10.0.0.1": _scan(True, level)}, ts=t0 + day * 86400)
+    f = h.ink_forecast(window=30 * 86400, now=t0 + 7 * 86400)
+    row = f[f["color"] == "black"].iloc[0]
+    assert row["level"] == 94 and row["per_day"] == 2.0 and row["days_left"] == 47.0
+    assert set(f["color"]) == {"black"}
@@ -0,0 +1,40 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.printer_ink import InkFetcher, parse_ink_levels
+
+PAGE = b"<html>Ink levels: Black 55% Cyan 40% Magenta 12% Yellow 90%</html>"
+
+def test_parse_ink_levels():
+    assert parse_ink_levels(PAGE.decode()) == {"black": "55%", "cyan": "40%", "magenta": "12%", "yellow": "90%"}
+    assert parse_ink_levels("<html>hello</html>")["black"] == "N/A"
+
+def test_fetcher_remembers_working_path_per_model():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            ok = self.path == "/status"
+            self.send_response(200 if ok else 404)
+            body = PAGE if ok else b""
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    host = f"127.0.0.1:{srv.server_address[1]}"
+    fetcher = InkFetcher(timeout=2)
+    try:
+        assert fetcher.fetch(host, "WF-C5790")["magenta"] == "12%"
+        assert len(hits) == 4 and fetcher.known_paths == {"WF-C5790": "/status"}
+        hits.clear()
+        assert fetcher.fetch_many([(host, "WF-C5790"), (host, "WF-C5790")]) == {host: parse_ink_levels(PAGE.decode())}
+        assert hits == ["/status"]
+    finally:
+        fetcher.close()
+        srv.shutdown()
@@ -0,0 +1,89 @@
+import socket
+import time
+
+import pytest
+
+from app import printer_poller
+from app.printer_poller import PrinterPoller
+
+def test_poller_fills_shared_store_and_picks_up_watched_ips(tmp_path):
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+    csv_path = tmp_path / "impressoras.csv"
+    csv_path.write_text("local,descricao_local,ip,serial,modelo,papercut,status_manual\n"
+                        "HQ1,Recepção,127.0.0.1,X1,WF,False,Ativo\n")
+    poller = PrinterPoller(csv_path, interval=60, timeout=0.5).start()
+    try:
+        assert poller.wait_for_scan(timeout=5)
+        assert poller.store.online_map() == {"127.0.0.1": True}
+        poller.watch(["127.0.0.2", "N/A"])
+        assert poller.poll_now(timeout=5)
+        assert set(poller.store.snapshot()) == {"127.0.0.1", "127.0.0.2"}
+    finally:
+        poller.stop()
+        srv.close()
+    assert not poller.running
+
+class _FakeFetcher:
+    def __init__(self):
+        self.calls = []
+
+    def fetch_many(self, printers):
+        self.calls.append(list(printers))
+        return {ip: {"black": "50%"} for ip, _ in printers}
+
+def test_ink_is_fetched_on_its_own_slower_interval(tmp_path, monkeypatch):
+    fetcher = _FakeFetcher()
+    monkeypatch.setattr(printer_poller, "get_ink_fetcher", lambda: fetcher)
+    monkeypatch.setattr(printer_poller, "scan_printers",
+                        lambda ips, timeout: {ip: {"ip": ip, "online": True} for ip in ips})
+    csv_path = tmp_path / "impressoras.csv"
+    csv_path.write_text("ip,modelo\n10.0.0.1,WF\n")
+    poller = PrinterPoller(csv_path, fetch_ink=True, ink_interval=3600)
+    first = poller.poll_once()
+    second = poller.poll_once()
+    assert fetcher.calls == [[("10.0.0.1", "WF")]]
+    assert "ink_levels" in first["10.0.0.1"] and "ink_levels" not in second["10.0.0.1"]
+    # the store keeps the last known levels between ink polls
+    assert poller.store.get("10.0.0.1")["ink_levels"] == {"black": "50%"}
+    poller.poll_once(ink=True)
+    assert len(fetcher.calls) == 2
+
+def test_ink_forecast_is_cached_and_refreshed_after_ink_polls(tmp_path, monkeypatch):
+    from app.printer_history import PrinterHistory
+    monkeypatch.setattr(printer_poller, "get_ink_fetcher", lambda: _FakeFetcher())
+    monkeypatch.setattr(printer_poller, "scan_printers",
+                        lambda ips, timeout: {ip: {"ip": ip, "online": True} for ip in ips})
+    csv_path = tmp_path / "impressoras.csv"
+    csv_path.write_text("ip,modelo\n10.0.0.1,WF\n")
+    history = PrinterHistory(tmp_path / "h.sqlite")
+    history.record({"10.0.0.1": {"online": True, "ink_levels": {"black": "60%"}}}, ts=time.time() - 86400)
+    poller = PrinterPoller(csv_path, fetch_ink=True, ink_interval=3600, history=history)
+    poller.poll_once()
+    first = poller.forecast
+    assert first.iloc[0]["color"] == "black" and first.iloc[0]["level"] == 50
+    poller.poll_once()  # status-only sweep: the cached forecast is reused
+    assert poller.forecast is first
+
+def test_push_mode_samples_the_store_into_history_and_keeps_fetching_ink(tmp_path, monkeypatch):
+    from app.printer_history import PrinterHistory
+    fetcher = _FakeFetcher()
+    monkeypatch.setattr(printer_poller, "get_ink_fetcher", lambda: fetcher)
+    monkeypatch.setattr(printer_poller, "scan_printers", lambda ips, timeout: pytest.fail("push mode must not scan"))
+    csv_path = tmp_path / "impressoras.csv"
+    csv_path.write_text("ip,modelo\n10.0.0.1,WF\n10.0.0.2,L3250\n")
+    history = PrinterHistory(tmp_path / "h.sqlite")
+    poller = PrinterPoller(csv_path, fetch_ink=True, ink_interval=3600, history=history, scan=False)
+    poller.poll_once()  # nothing pushed yet: no rows, ink stays due
+    assert fetcher.calls == [] and len(history.range(0)) == 0
+
+    # pushed once (a single state change), then sampled on every sweep
+    poller.store.update({"10.0.0.1": {"ip": "10.0.0.1", "online": True}, "10.0.0.2": {"ip": "10.0.0.2", "online": False}})
+    for _ in range(3):
+        poller.poll_once()
+    assert fetcher.calls == [[("10.0.0.1", "WF")]]
+    assert poller.store.get("10.0.0.1") == {"ip": "10.0.0.1", "online": True, "ink_levels": {"black": "50%"}}
+    rows = history.range(0)
+    assert len(rows) == 6 and rows["black"].notna().sum() == 1
+    assert set(history.uptime(0).values()) == {100.0, 0.0}
@@ -0,0 +1,31 @@
+import socket
+import time
+
+from app.printer_scan import scan_printers
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_scan_marks_listening_host_online_and_closed_port_as_refused():
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+    port = srv.getsockname()[1]
+    try:
+        res = scan_printers(["127.0.0.1", "127.0.0.1", "N/A"], ports=(port,), timeout=1.0)
+        assert list(res) == ["127.0.0.1"]
+        assert res["127.0.0.1"]["online"] and res["127.0.0.1"]["method"] == f"tcp:{port}"
+    finally:
+        srv.close()
+    # connection refused still means the host answered
+    assert scan_printers(["127.0.0.1"], ports=(_free_port(),), timeout=1.0)["127.0.0.1"]["online"]
+
+def test_unreachable_hosts_are_scanned_within_one_timeout():
+    # TEST-NET-1 addresses: at worst every probe waits out its timeout
+    ips = [f"192.0.2.{i}" for i in range(1, 41)]
+    start = time.perf_counter()
+    res = scan_printers(ips, ports=(9100, 80), timeout=0.5)
+    assert time.perf_counter() - start < 2.0
+    assert len(res) == 40
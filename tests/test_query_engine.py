@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("duckdb")
+from app.experiment import SimulationContext
+from app.ingest import basic_eda, load_data
+from app.query_engine import DuckDBEngine
+
+def test_duckdb_matches_pandas():
+    eng = DuckDBEngine("data")
+    df_tx, df_cust = load_data("data", fmt="csv")
+    expected = basic_eda(df_tx)
+    got = eng.basic_eda()
+    assert got["n"].tolist() == expected["n"].tolist()
+    assert got["avg_amt"].tolist() == pytest.approx(expected["avg_amt"].tolist())
+    ctx, ref = eng.simulation_context(), SimulationContext.from_frames(df_tx, df_cust)
+    assert ctx.rev_base == pytest.approx(ref.rev_base)
+    assert ctx.spend_by_segment == pytest.approx(ref.spend_by_segment)
+    assert ctx.revenue_by_category == pytest.approx(ref.revenue_by_category)
+    assert eng.query("SELECT count(*) AS n FROM customers")["n"][0] == len(df_cust)
+
+def test_memory_limit_is_quoted():
+    eng = DuckDBEngine("data", memory_limit="1GB")
+    assert eng.query("SELECT current_setting('memory_limit') AS v")["v"][0] != ""
+    with pytest.raises(Exception):
+        DuckDBEngine("data", memory_limit="1GB'; CREATE TABLE pwned (x INT); --")
@@ -1,3 +1,4 @@
+import pytest
 import pandas as pd
 from app.risk import train_scorecard
 
@@ -17,3 +18,82 @@ def test_train_scorecard_minimal():
     assert 0.0 <= report["metrics"]["auroc"] <= 1.0
     assert "features" in report["model"]
     assert isinstance(model.predict_proba(df), (list, tuple)) or model.predict_proba(df).shape[0] == len(df)
+
+def test_model_registry_versions():
+    from app.risk import ModelRegistry
+    df = pd.DataFrame({
+        "amount":[10,20,500,60,80,120],
+        "channel":["card","card","card","pix","card","boleto"],
+        "label_fraud":[0,0,1,0,0,1],
+    })
+    reg = ModelRegistry()
+    assert reg.latest is None
+    v1 = reg.train(df)
+    v2 = reg.train(df)
+    assert (v1, v2) == (1, 2)
+    assert reg.versions() == [1, 2]
+    model, report = reg.get()
+    assert report["version"] == 2
+    assert model.predict_proba(df).shape[0] == len(df)
+    with pytest.raises(KeyError):
+        reg.get(99)
+
+def test_auroc_and_ks_match_brute_force():
+    import numpy as np
+    from app.risk import auroc, ks_statistic
+    rng = np.random.default_rng(3)
+    y = rng.integers(0, 2, 300)
+    p = np.round(rng.random(300) * 0.5 + 0.3 * y, 2)  # plenty of ties
+    pos, neg = p[y == 1], p[y == 0]
+    pairs = (pos[:, None] > neg[None, :]) + 0.5 * (pos[:, None] == neg[None, :])
+    assert auroc(y, p) == pytest.approx(pairs.mean())
+    grid = np.unique(p)
+    ks = max(abs((pos <= g).mean() - (neg <= g).mean()) for g in grid)
+    assert ks_statistic(y, p) == pytest.approx(ks)
+    assert auroc(np.zeros(5), p[:5]) == 0.5
+    assert ks_statistic(np.ones(5), p[:5]) == 0.0
+
+def test_categorical_codes_are_batch_independent():
+    df = pd.DataFrame({
+        "amount":[10,20,500,60,80,120],
+        "channel":["card","card","card","pix","card","boleto"],
+        "label_fraud":[0,0,1,0,0,1],
+    })
+    model, report = train_scorecard(df)
+    assert report["model"]["vocab"]["channel"] == ["boleto", "card", "pix"]
+    batch = model.predict_proba(df)
+    single = [model.predict_proba(df.iloc[[i]])[0] for i in range(len(df))]
+    assert list(batch) == pytest.approx(single)
+    assert model.encode("channel", ["pix", "crypto"]).tolist() == [2.0, -1.0]
+
+def test_streaming_trainer_matches_in_memory(tmp_path):
+    from app.risk import RunningMoments, csv_chunks, train_scorecard_streaming
+    df = pd.read_csv("data/transactions_small.csv")
+    model, report = train_scorecard(df)
+    s_model, s_report = train_scorecard_streaming(csv_chunks("data/transactions_small.csv", chunksize=250))
+    assert s_report["model"] == report["model"]
+    assert s_report["n_rows"] == len(df)
+    assert s_report["metrics"]["auroc"] == pytest.approx(report["metrics"]["auroc"], abs=0.01)
+    assert s_report["metrics"]["ks"] == pytest.approx(report["metrics"]["ks"], abs=0.01)
+    # moments merge to the same correlation as one pass
+    a, b = RunningMoments(), RunningMoments()
+    a.update(df["amount"][:600], df["label_fraud"][:600])
+    b.update(df["amount"][600:], df["label_fraud"][600:])
+    a.merge(b)
+    import numpy as np
+    assert a.corr() == pytest.approx(np.corrcoef(df["amount"], df["label_fraud"])[0, 1])
+
+def test_fairness_covers_protected_columns_without_rescoring():
+    from app.risk import auroc
+    df = pd.read_csv("data/transactions_small.csv")
+    cust = pd.read_csv("data/customers_small.csv")
+    df = df.merge(cust[["customer_id", "income_band", "risk_segment"]], on="customer_id")
+    model, report = train_scorecard(df)
+    assert set(report["fairness"]) == {"income_band", "risk_segment", "country"}
+    for col, rows in report["fairness"].items():
+        for row in rows:
+            grp = df[df[col] == row["band"]]
+            assert row["auroc"] == pytest.approx(auroc(grp["label_fraud"].to_numpy(), model.predict_proba(grp)))
+            assert row["positive_rate"] == pytest.approx(grp["label_fraud"].mean())
+    _, only_band = train_scorecard(df, protected=["income_band"])
+    assert list(only_band["fairness"]) == ["income_band"]
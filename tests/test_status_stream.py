@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+pytest.importorskip("flask_cors")
+from werkzeug.serving import make_server
+
+import ping_service
+from app.printer_poller import PrinterStatusStore
+from app.status_stream import StatusStreamReceiver, parse_sse
+
+def test_parse_sse_skips_comments_and_joins_data_lines():
+    lines = [": keep-alive", "", "id: 1", "event: status", 'data: {"ip":', 'data: "a"}', "", "data: x", ""]
+    assert list(parse_sse(lines)) == [("status", '{"ip":\n"a"}'), ("message", "x")]
+
+@pytest.fixture
+def agent(monkeypatch):
+    state = {"10.9.0.1": True, "10.9.0.2": False}
+
+    def fake_ping(ip):
+        return {"ip": ip, "online": state[ip], "timestamp": "t"}
+
+    monkeypatch.setattr(ping_service, "ping_ip_real", fake_ping)
+    monkeypatch.setattr(ping_service, "WATCH_INTERVAL", 0.1)
+    monkeypatch.setattr(ping_service, "HEARTBEAT_INTERVAL", 0.2)
+    monkeypatch.setattr(ping_service, "broker", ping_service.EventBroker())
+    ping_service.ping_cache.clear()
+    srv = make_server("127.0.0.1", 0, ping_service.app, threaded=True)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}", state
+    ping_service.watched_ips.clear()
+    srv.shutdown()
+
+def test_receiver_applies_pushed_status_changes(agent):
+    url, state = agent
+    store = PrinterStatusStore()
+    pushed = []
+    receiver = StatusStreamReceiver(url, store, ["10.9.0.1", "10.9.0.2"], on_event=pushed.append).start()
+    try:
+        assert receiver.connected.wait(5)
+        assert store.wait_for_update(0, timeout=5)
+        for _ in range(50):
+            if store.online_map() == {"10.9.0.1": True, "10.9.0.2": False}:
+                break
+            store.wait_for_update(store.scans, timeout=0.2)
+        assert store.online_map() == {"10.9.0.1": True, "10.9.0.2": False}
+
+        n = len(pushed)
+        state["10.9.0.2"] = True  # printer comes back: only this change is pushed
+        assert store.wait_for_update(store.scans, timeout=5)
+        assert store.online_map()["10.9.0.2"] is True
+        assert pushed[n:] == [{"10.9.0.2": {"ip": "10.9.0.2", "online": True, "timestamp": "t"}}]
+    finally:
+        receiver.stop()
+
+def test_single_ping_goes_through_the_agent(agent):
+    url, state = agent
+    store = PrinterStatusStore()
+    receiver = StatusStreamReceiver(url, store)
+    assert receiver.ping("10.9.0.2") == {"ip": "10.9.0.2", "online": False, "timestamp": "t"}
+    assert store.online_map() == {"10.9.0.2": False}
+    assert StatusStreamReceiver("http://127.0.0.1:9", store).ping("10.9.0.1", timeout=1) is None
+    assert store.online_map() == {"10.9.0.2": False}
@@ -0,0 +1,63 @@
+import json
+import threading
+
+from app.sync_store import SyncStore
+
+def _default():
+    return {"ping_results": {}, "sync_status": "waiting"}
+
+def test_concurrent_updates_are_batched_into_one_compact_write(tmp_path):
+    path = tmp_path / "sync_data.json"
+    store = SyncStore(path, _default, flush_interval=5)
+
+    def worker(i):
+        for j in range(50):
+            store.update(lambda d, ip=f"10.0.{i}.{j}": d["ping_results"].__setitem__(ip, {"online": True}))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store.get("ping_results")) == 400
+    assert not path.exists()  # nothing written synchronously
+
+    store.flush()
+    text = path.read_text(encoding="utf-8")
+    assert "\n" not in text and len(json.loads(text)["ping_results"]) == 400
+    assert store.writes == 1
+    assert not list(tmp_path.glob(".*.tmp"))
+
+def test_reloads_file_written_by_another_process_and_resets(tmp_path):
+    path = tmp_path / "sync_data.json"
+    store = SyncStore(path, _default, flush_interval=60)
+    path.write_text(json.dumps({"ping_results": {"1.2.3.4": {"online": False}}, "sync_status": "synced"}))
+    assert store.get("sync_status") == "synced"
+    store.reset()
+    assert store.get("ping_results") == {} and not path.exists()
+
+def test_reset_waits_for_an_in_flight_flush(tmp_path, monkeypatch):
+    import app.sync_store as sync_store
+    path = tmp_path / "sync_data.json"
+    store = SyncStore(path, _default, flush_interval=60)
+    store.update(lambda d: d.__setitem__("sync_status", "synced"))
+    serialized, release = threading.Event(), threading.Event()
+    real_replace = sync_store.os.replace
+
+    def slow_replace(src, dst):
+        serialized.set()
+        release.wait(5)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(sync_store.os, "replace", slow_replace)
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    assert serialized.wait(5)
+    resetter = threading.Thread(target=store.reset)
+    resetter.start()
+    resetter.join(0.2)  # give reset the chance to run mid-flush
+    release.set()
+    flusher.join()
+    resetter.join()
+    # the old payload must not reappear on disk after "Limpar Dados"
+    assert not path.exists() and store.get("sync_status") == "waiting"